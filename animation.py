@@ -0,0 +1,140 @@
+"""Step-by-step replay of a recorded Dijkstra search for the Dijkstra Algorithm Visualizer.
+
+The search is recorded once as a search.SearchTrace. For every node and
+edge, the step at which it was first reached and the step at which it was
+settled are computed once with NumPy. The colors for any step are then a
+few vectorized comparisons, so seeking backwards or forwards costs the same
+and never runs the search again.
+
+Frames only change the renderer's overlay colors and blit them. Playback
+is timed by the clock, not by frames. Each frame advances by
+speed * elapsed seconds, so a slow draw on a large graph batches more steps
+into the next frame instead of slowing the whole animation down.
+"""
+import time
+
+import numpy as np
+from matplotlib.colors import to_rgba
+
+from renderer import HIGHLIGHT_COLOR
+from search import RELAX, SETTLE
+
+FRONTIER_COLOR = to_rgba('gold', 0.7)  # Reached, with a tentative distance
+SETTLED_COLOR = to_rgba('mediumseagreen', 0.7)  # Distance is final
+CURRENT_COLOR = to_rgba('red')  # The node of the latest step
+NOT_REACHED = np.iinfo(np.int64).max
+
+
+class TraceAnimation:
+    """Plays a SearchTrace on a GraphRenderer, driven by master.after().
+
+    position is the number of steps shown. on_frame(position) is called
+    after every frame, for example to move a slider.
+    """
+
+    FRAME_RATE = 30  # Target frames per second
+
+    def __init__(self, master, renderer, trace, speed=50, on_frame=None):
+        self.master = master
+        self.renderer = renderer
+        self.trace = trace
+        self.speed = speed  # Steps per second
+        self.on_frame = on_frame
+        self.position = 0
+        self.playing = False
+        self._after = None
+        self._last_tick = None
+        self._carry = 0.0  # Fraction of a step left over from the last frame
+
+        kinds = np.frombuffer(trace.kinds, dtype=np.int8)
+        nodes = np.frombuffer(trace.nodes, dtype=np.int32)
+        edges = np.frombuffer(trace.edges, dtype=np.int32)
+        steps = np.arange(len(kinds))
+        node_count = int(nodes.max()) + 1 if len(nodes) else 0
+        edge_count = int(edges.max()) + 1 if len(edges) else 0
+        relax, settle = kinds == RELAX, kinds == SETTLE
+
+        # First step at which each node or edge was reached, and the step that settled it
+        self.node_reached = np.full(node_count, NOT_REACHED)
+        np.minimum.at(self.node_reached, nodes, steps)
+        self.node_settled = np.full(node_count, NOT_REACHED)
+        self.node_settled[nodes[settle]] = steps[settle]
+        self.edge_reached = np.full(edge_count, NOT_REACHED)
+        np.minimum.at(self.edge_reached, edges[relax], steps[relax])
+        tree = settle & (edges >= 0)
+        self.edge_settled = np.full(edge_count, NOT_REACHED)
+        self.edge_settled[edges[tree]] = steps[tree]
+
+    def __len__(self):
+        return len(self.trace)
+
+    def play(self):
+        """Play from the current position, restarting if it is at the end."""
+        if self.position >= len(self):
+            self.position = 0
+        self.playing = True
+        self._last_tick = time.perf_counter()
+        self._carry = 0.0
+        self._schedule(0)
+
+    def pause(self):
+        """Stop playback at the current position."""
+        self.playing = False
+        if self._after is not None:
+            self.master.after_cancel(self._after)
+            self._after = None
+
+    def seek(self, position):
+        """Show the state after the first position steps."""
+        self.position = max(0, min(int(position), len(self)))
+        self.show()
+
+    def _schedule(self, delay):
+        self._after = self.master.after(max(1, int(delay)), self._tick)
+
+    def _tick(self):
+        self._after = None
+        if not self.playing:
+            return
+        now = time.perf_counter()
+        self._carry += (now - self._last_tick) * self.speed
+        self._last_tick = now
+        steps = int(self._carry)
+        self._carry -= steps
+        self.position = min(self.position + steps, len(self))
+        self.show()
+        if self.position >= len(self):
+            self.playing = False
+            return
+        spent = time.perf_counter() - now
+        self._schedule(1000 / self.FRAME_RATE - spent * 1000)  # Keep the frame rate when drawing is slow
+
+    def colors(self, position):
+        """Return (node_colors, edge_colors, labelled nodes) for the state after position steps."""
+        renderer = self.renderer
+        node_colors = np.zeros((len(renderer.xy), 4))
+        edge_colors = np.zeros((len(renderer.segments), 4))
+        n = min(len(node_colors), len(self.node_reached))
+        m = min(len(edge_colors), len(self.edge_reached))
+        node_colors[:n][self.node_reached[:n] < position] = FRONTIER_COLOR
+        node_colors[:n][self.node_settled[:n] < position] = SETTLED_COLOR
+        edge_colors[:m][self.edge_reached[:m] < position] = FRONTIER_COLOR
+        edge_colors[:m][self.edge_settled[:m] < position] = SETTLED_COLOR
+
+        labelled = []
+        if position >= len(self) and self.trace.path is not None:
+            labelled = [i for i in self.trace.path_nodes if i < len(node_colors)]
+            node_colors[labelled] = to_rgba(HIGHLIGHT_COLOR)
+            edge_colors[[i for i in self.trace.path_edges if i < len(edge_colors)]] = to_rgba(HIGHLIGHT_COLOR)
+        elif position > 0:
+            current = self.trace.nodes[position - 1]
+            if current < len(node_colors):
+                node_colors[current] = CURRENT_COLOR
+                labelled = [current]
+        return node_colors, edge_colors, labelled
+
+    def show(self):
+        """Color the renderer's overlay for the current position."""
+        self.renderer.set_overlay(*self.colors(self.position))
+        if self.on_frame is not None:
+            self.on_frame(self.position)
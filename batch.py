@@ -0,0 +1,123 @@
+"""Batch many-to-many shortest-path queries for the Dijkstra Algorithm Visualizer.
+
+Pairs are read from a CSV file with a header row and one "source,target"
+pair per row. They are grouped by source, so each source costs one Dijkstra
+run however many targets it has. The sources are spread across a
+ProcessPoolExecutor.
+
+The graph is not pickled for the workers. It is written once to a binary
+snapshot (see graph_io), and every worker memory-maps that snapshot, so all
+processes share the same pages.
+"""
+import csv
+import os
+import sys
+import tempfile
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from math import inf
+
+from graph_io import load_snapshot
+from search import unwind
+
+_worker_graph = None  # CSRGraph mapped by each worker process
+
+
+def read_pairs(file_path):
+    """Read (source, target) pairs from a CSV file with a header row."""
+    with open(file_path, mode='r', newline='') as file:
+        reader = csv.reader(file)
+        next(reader, None)  # Skip header
+        return [(row[0], row[1]) for row in reader if len(row) >= 2]
+
+
+def group_by_source(pairs):
+    """Return an ordered source -> [targets] mapping."""
+    groups = OrderedDict()
+    for source, target in pairs:
+        groups.setdefault(source, []).append(target)
+    return groups
+
+
+def _init_worker(snapshot_path):
+    global _worker_graph
+    _worker_graph, _ = load_snapshot(snapshot_path)
+
+
+def _solve_sources(groups, with_paths):
+    """Answer the targets of several sources on the worker's graph. Returns result rows."""
+    csr = _worker_graph
+    rows = []
+    for source, targets in groups:
+        if source not in csr.index:
+            rows.extend((source, target, inf, "") for target in targets)
+            continue
+        dist, pred = csr.dijkstra(csr.index[source])
+        for target in targets:
+            node = csr.index.get(target)
+            if node not in dist:
+                rows.append((source, target, inf, ""))
+            elif with_paths:
+                path = unwind(pred, node)
+                rows.append((source, target, dist[node], " -> ".join(csr.labels[i] for i in path)))
+            else:
+                rows.append((source, target, dist[node], ""))
+    return rows
+
+
+def run_batch(snapshot_path, pairs, workers=None, with_paths=True, chunk_size=None):
+    """Yield (source, target, length, path) rows as worker processes finish them.
+
+    Rows arrive in completion order. Unreachable targets have length inf and
+    an empty path.
+    """
+    workers = workers or os.cpu_count() or 1
+    groups = list(group_by_source(pairs).items())
+    chunk_size = chunk_size or max(1, len(groups) // (workers * 8))
+    chunks = (groups[i:i + chunk_size] for i in range(0, len(groups), chunk_size))
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(snapshot_path,)) as pool:
+        pending = set()
+        for chunk in chunks:
+            pending.add(pool.submit(_solve_sources, chunk, with_paths))
+            if len(pending) >= workers * 2:  # Bound the results held in memory
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield from future.result()
+        for future in pending:
+            yield from future.result()
+
+
+def main(graph_path, pairs_path, output_path=None, workers=None, with_paths=True, directed=False):
+    """Answer every pair in pairs_path on the graph in graph_path and write the result CSV.
+
+    graph_path is a snapshot, or a CSV graph that is converted to a temporary
+    snapshot first, as a directed graph if directed is set. Results go to
+    output_path, or to stdout.
+    """
+    from graph_engine import GraphEngine
+
+    temporary = None
+    if not graph_path.endswith(".graph"):
+        engine = GraphEngine(directed=directed)
+        report = engine.import_csv(graph_path)
+        if report.malformed:
+            print(report.summary(), file=sys.stderr)
+        fd, temporary = tempfile.mkstemp(suffix=".graph")
+        os.close(fd)
+        engine.save_snapshot(temporary)
+        graph_path = temporary
+
+    try:
+        output = open(output_path, mode='w', newline='') if output_path else sys.stdout
+        try:
+            writer = csv.writer(output)
+            writer.writerow(["Source", "Target", "Length", "Path"] if with_paths else ["Source", "Target", "Length"])
+            for source, target, length, path in run_batch(graph_path, read_pairs(pairs_path), workers, with_paths):
+                writer.writerow([source, target, length, path] if with_paths else [source, target, length])
+        finally:
+            if output is not sys.stdout:
+                output.close()
+    finally:
+        if temporary:
+            os.remove(temporary)
@@ -0,0 +1,505 @@
+"""Benchmarks for the Dijkstra Algorithm Visualizer.
+
+Run with ``python benchmark.py`` to print timings to the console. Each
+benchmark looks at one technique. benchmark_suite.py instead times every
+stage of both GUI variants on synthetic graphs and records the results as
+JSON, so runs on different commits can be compared.
+"""
+import argparse
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+import networkx as nx
+
+import batch
+import layout
+from graph_engine import BackgroundQuery, GraphEngine, k_shortest_paths
+
+
+def weighted(graph, seed=0):
+    """Relabel nodes to strings and assign random integer weights, matching imported graphs."""
+    rng = random.Random(seed)
+    graph = nx.relabel_nodes(graph, {node: str(i) for i, node in enumerate(graph.nodes())})
+    for u, v in graph.edges():
+        graph[u][v]['weight'] = float(rng.randint(1, 10))
+    return graph
+
+
+def grid_graph(side, seed=0):
+    """Create a weighted side x side grid graph."""
+    return weighted(nx.grid_2d_graph(side, side), seed)
+
+
+def random_graph(n, seed=0):
+    """Create a weighted connected random graph with an average degree of about 4."""
+    graph = nx.gnm_random_graph(n, 2 * n, seed=seed)
+    graph.add_edges_from(zip(range(n - 1), range(1, n)))  # Keep it connected
+    return weighted(graph, seed)
+
+
+def all_simple_paths_top_k(graph, source, target, k):
+    """The original approach: enumerate every simple path, sort by length and keep the top k."""
+    paths = []
+    for p in nx.all_simple_paths(graph, source, target):
+        paths.append((p, sum(graph[u][v]['weight'] for u, v in zip(p[:-1], p[1:]))))
+    paths.sort(key=lambda x: x[1])
+    return paths[:k]
+
+
+def timed(func, *args):
+    """Return the wall-clock seconds taken by one call."""
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def bench_alternate_paths(k=4, budget=0.5):
+    """Compare lazy k-shortest paths against full simple path enumeration on growing graphs."""
+    cases = [("grid", side * side, grid_graph(side)) for side in (3, 4, 5, 6, 10, 30)]
+    cases += [("random", n, random_graph(n)) for n in (10, 15, 20, 25, 100, 1000)]
+
+    print(f"{'graph':<8}{'nodes':>8}{'all_simple_paths':>20}{'k_shortest_paths':>20}")
+    skip_enumeration = set()
+    for kind, n, graph in cases:
+        source, target = '0', str(n - 1)
+        lazy = timed(lambda: list(k_shortest_paths(graph, source, target, k)))
+        if kind in skip_enumeration:
+            full = "skipped"
+        else:
+            seconds = timed(all_simple_paths_top_k, graph, source, target, k)
+            full = f"{seconds:.4f}s"
+            if seconds > budget:
+                skip_enumeration.add(kind)  # Larger graphs of this kind would take far longer
+        print(f"{kind:<8}{n:>8}{full:>20}{lazy:>19.4f}s")
+
+
+def bench_compact_backend(sizes=(1000, 10000, 100000), queries=20, seed=0):
+    """Compare the networkx and CSR backends, checking that they return identical results."""
+    print(f"{'nodes':>8}{'edges':>10}{'freeze':>10}{'networkx':>12}{'csr':>12}{'csr arrays':>12}")
+    for n in sizes:
+        engine = GraphEngine()
+        engine.graph = random_graph(n, seed)
+        compact = GraphEngine(compact=True)
+        compact.graph = engine.graph
+        freeze = timed(compact.compact_graph)
+        csr = compact.compact_graph()
+
+        rng = random.Random(seed)
+        pairs = [(str(rng.randrange(n)), str(rng.randrange(n))) for _ in range(queries)]
+        nx_time = csr_time = 0.0
+        for source, target in pairs:
+            start = time.perf_counter()
+            expected = engine.shortest_path(source, target)
+            nx_time += time.perf_counter() - start
+            start = time.perf_counter()
+            result = compact.shortest_path(source, target)
+            csr_time += time.perf_counter() - start
+            if result != expected:
+                raise AssertionError(f"CSR result {result} differs from networkx {expected}")
+            path_edges = list(zip(expected[1][:-1], expected[1][1:]))
+            if n <= 10000 and (compact.find_alternate_paths(source, target, path_edges)
+                               != engine.find_alternate_paths(source, target, path_edges)):
+                raise AssertionError(f"CSR alternate paths differ from networkx for {source} -> {target}")
+
+        array_bytes = csr.indptr.nbytes + csr.indices.nbytes + csr.weights.nbytes
+        print(f"{n:>8}{engine.graph.number_of_edges():>10}{freeze:>9.3f}s{nx_time / queries * 1000:>10.2f}ms"
+              f"{csr_time / queries * 1000:>10.2f}ms{array_bytes / 2 ** 20:>10.1f}MB")
+
+
+def bench_layout(sizes=(50, 100, 200)):
+    """Compare building a graph node by node with a full spring layout per add against incremental placement."""
+    print(f"{'nodes':>8}{'full per add':>16}{'incremental':>16}")
+    for n in sizes:
+        graph = random_graph(n)
+        results = []
+        full = lambda g, pos: layout.relayout(g)
+        incremental = lambda g, pos: {**pos, **layout.place_new_nodes(g, pos)}
+        for place in (full, incremental):
+            building = graph.subgraph([]).copy()
+            pos = {}
+            start = time.perf_counter()
+            for node in graph:
+                building.add_node(node)
+                building.add_edges_from((node, nbr, data) for nbr, data in graph[node].items() if nbr in building)
+                pos = place(building, pos)
+            results.append(time.perf_counter() - start)
+        print(f"{n:>8}{results[0]:>15.3f}s{results[1]:>15.3f}s")
+
+
+def bench_highlight_lookup(sides=(30, 100, 200)):
+    """Compare finding a path's node and edge positions by list(...).index() against the engine's index maps."""
+    print(f"{'nodes':>8}{'path':>6}{'list.index':>14}{'index maps':>14}")
+    for side in sides:
+        engine = GraphEngine()
+        engine.graph = grid_graph(side)
+        _, path = engine.shortest_path('0', str(side * side - 1))
+        path_edges = list(zip(path[:-1], path[1:]))
+        graph = engine.graph
+        canonical_edges = set(graph.edges())
+        # The old lookup needs each edge in the orientation graph.edges() yields it
+        oriented = [(u, v) if (u, v) in canonical_edges else (v, u) for u, v in path_edges]
+
+        def list_index():
+            for node in path:
+                list(graph.nodes()).index(node)
+            for edge in oriented:
+                list(graph.edges()).index(edge)
+
+        def index_maps():
+            for node in path:
+                engine.node_index[node]
+            for u, v in path_edges:
+                engine.edge_index[engine.edge_key(u, v)]
+
+        engine.edge_index  # Built once; afterwards it is kept in sync by the mutating methods
+        print(f"{side * side:>8}{len(path):>6}{timed(list_index) * 1000:>12.2f}ms"
+              f"{timed(index_maps) * 1000:>12.3f}ms")
+
+
+def copy_and_remove_alternates(graph, source, target, path_edges):
+    """The original approach: copy the graph, remove one more path edge per search."""
+    alternate_paths = []
+    G_temp = graph.copy()
+    for edge in path_edges:
+        G_temp.remove_edge(*edge)
+        try:
+            alternate_paths.append(nx.single_source_dijkstra(G_temp, source, target=target))
+        except nx.NetworkXNoPath:
+            continue
+    return alternate_paths
+
+
+def bench_replacement_paths(sides=(30, 60, 120)):
+    """Compare copy-and-remove alternate paths against replacement paths from two shortest-path trees."""
+    print(f"{'nodes':>8}{'path':>6}{'copy+remove':>14}{'cumulative':>14}{'replacement':>14}")
+    for side in sides:
+        engine = GraphEngine()
+        engine.graph = grid_graph(side)
+        source, target = '0', str(side * side - 1)
+        _, path = engine.shortest_path(source, target)
+        path_edges = list(zip(path[:-1], path[1:]))
+        old = timed(copy_and_remove_alternates, engine.graph, source, target, path_edges)
+        cumulative = timed(lambda: engine.find_alternate_paths(source, target, path_edges, restore_edges=False))
+        replacement = timed(engine.find_alternate_paths, source, target, path_edges)
+        print(f"{side * side:>8}{len(path):>6}{old:>13.3f}s{cumulative:>13.3f}s{replacement:>13.3f}s")
+
+
+def bench_path_cache(side=150, sources=5, targets=40, seed=0):
+    """Compare uncached queries against the per-source tree cache for several targets per source."""
+    graph = grid_graph(side)
+    rng = random.Random(seed)
+    n = side * side
+    queries = [(str(rng.randrange(n)), str(rng.randrange(n))) for _ in range(sources)]
+    queries = [(source, str(rng.randrange(n))) for source, _ in queries for _ in range(targets)]
+    for cache_nodes in (0, 1_000_000):
+        engine = GraphEngine(cache_nodes=cache_nodes)
+        engine.graph = graph
+        seconds = timed(lambda: [engine.shortest_path(source, target) for source, target in queries])
+        stats = f", {engine.cache.stats()}" if engine.cache else ""
+        print(f"{'cached' if cache_nodes else 'uncached':>9}: {len(queries)} queries in {seconds:.3f}s{stats}")
+
+
+def bench_search_modes(side=150, queries=50, seed=0):
+    """Compare nodes settled and time per query for each search method, checking they agree with Dijkstra."""
+    engine = GraphEngine(cache_nodes=0)  # Plain Dijkstra then stops at the target, like the other methods
+    engine.graph = grid_graph(side)
+    engine.pos = {str(i): (i // side, i % side) for i in range(side * side)}  # grid_2d_graph order
+    rng = random.Random(seed)
+    pairs = [(str(rng.randrange(side * side)), str(rng.randrange(side * side))) for _ in range(queries)]
+    engine.shortest_path(*pairs[0], method='astar')  # Precompute the heuristics outside the timings
+    engine.shortest_path(*pairs[0], method='alt')
+    engine.build_hierarchy()
+
+    expected = None
+    for method in GraphEngine.SEARCH_METHODS:
+        lengths, settled = [], 0
+        start = time.perf_counter()
+        for source, target in pairs:
+            lengths.append(engine.shortest_path(source, target, method)[0])
+            settled += engine.last_settled
+        seconds = time.perf_counter() - start
+        expected = expected or lengths
+        print(f"{method:>13}: {settled / queries:9.0f} nodes settled, {seconds / queries * 1000:7.2f} ms per query")
+        if lengths != expected:
+            raise AssertionError(f"{method} lengths differ from {GraphEngine.SEARCH_METHODS[0]} on {side * side} nodes")
+
+
+def bench_contraction(sides=(50, 100, 150), queries=200, seed=0):
+    """Time building and reloading a contraction hierarchy, and its queries against plain Dijkstra."""
+    print(f"{'nodes':>8} {'build':>9} {'shortcuts':>10} {'reload':>9} {'dijkstra':>10} {'ch':>10} {'settled':>8}")
+    for side in sides:
+        engine = GraphEngine(compact=True, cache_nodes=0)
+        engine.graph = grid_graph(side)
+        build = timed(engine.build_hierarchy)
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, "grid.graph")
+            engine.save_snapshot(file_path)
+            reloaded = GraphEngine(cache_nodes=0)
+            reload = timed(reloaded.load_snapshot, file_path)
+            assert not reloaded.hierarchy_stale and reloaded._hierarchy is not None
+
+            rng = random.Random(seed)
+            pairs = [(str(rng.randrange(side * side)), str(rng.randrange(side * side))) for _ in range(queries)]
+            expected = [engine.shortest_path(source, target)[0] for source, target in pairs]
+            dijkstra = timed(lambda: [engine.shortest_path(source, target) for source, target in pairs])
+            settled = 0
+            start = time.perf_counter()
+            for (source, target), length in zip(pairs, expected):
+                assert reloaded.shortest_path(source, target, 'ch')[0] == length
+                settled += reloaded.last_settled
+            ch = time.perf_counter() - start
+            del reloaded  # Release the mapped files before the directory is removed
+        print(f"{side * side:>8} {build:>8.2f}s {engine.build_hierarchy().number_of_shortcuts():>10} "
+              f"{reload * 1000:>7.2f}ms {dijkstra / queries * 1000:>8.2f}ms {ch / queries * 1000:>8.3f}ms "
+              f"{settled / queries:>8.0f}")
+
+
+def random_edits(graph, count, seed=0):
+    """Return (node1, node2, weight) edits: reweighted existing edges, with a new short-range edge every fourth."""
+    rng = random.Random(seed)
+    edges = list(graph.edges())
+    nodes = list(graph)
+    edits = []
+    for i in range(count):
+        if i % 4 == 3:
+            u = rng.choice(nodes)
+            v = rng.choice(list(graph[rng.choice(list(graph[u]))]))  # Two hops away
+            edits.append((u, v, float(rng.randint(1, 10))))
+        else:
+            u, v = rng.choice(edges)
+            edits.append((u, v, float(rng.randint(1, 10))))
+    return edits
+
+
+def check_self_loop_increases(graph, targets, seed=0):
+    """Raise AssertionError unless the incremental tree matches Dijkstra when tree edges get heavier.
+
+    Every node gets a zero-weight self-loop, which a node must never take as
+    the edge to its own parent.
+    """
+    rng = random.Random(seed)
+    engine = GraphEngine(incremental=True)
+    engine.graph = graph.copy()
+    engine.graph.add_weighted_edges_from((node, node, 0.0) for node in graph)
+    for target in targets:
+        _, path = engine.shortest_path('0', target)
+        if len(path) < 2:
+            continue
+        i = rng.randrange(len(path) - 1)
+        u, v = path[i], path[i + 1]  # A tree edge, so the increase repairs a subtree
+        engine.add_edge(u, v, engine.graph[u][v]['weight'] + rng.randint(1, 10))
+        length = engine.shortest_path('0', target)[0]
+        if length != nx.dijkstra_path_length(engine.graph, '0', target):
+            raise AssertionError(f"Incremental length to {target} differs from Dijkstra after {u}-{v} got heavier")
+
+
+def bench_dynamic_updates(sides=(50, 100, 200), edits=200, seed=0):
+    """Compare full recomputation after every edit against the incrementally maintained tree."""
+    print(f"{'nodes':>8}{'edits':>7}{'full':>12}{'incremental':>14}{'changed':>10}")
+    for side in sides:
+        graph = grid_graph(side, seed)
+        n = side * side
+        sequence = random_edits(graph, edits, seed)
+        rng = random.Random(seed)
+        targets = [str(rng.randrange(n)) for _ in sequence]
+        results = []
+        for incremental in (False, True):
+            engine = GraphEngine(incremental=incremental)
+            engine.graph = graph.copy()
+            engine.shortest_path('0', targets[0])  # Build the first tree outside the timings
+            lengths, changed = [], 0
+            start = time.perf_counter()
+            for (u, v, weight), target in zip(sequence, targets):
+                engine.add_edge(u, v, weight)
+                changed += engine.last_changed
+                lengths.append(engine.shortest_path('0', target)[0])
+            results.append((time.perf_counter() - start, lengths, changed))
+        (full, expected, _), (fast, lengths, changed) = results
+        if lengths != expected:
+            raise AssertionError(f"Incremental lengths differ from full recomputation on {n} nodes")
+        check_self_loop_increases(graph, targets[:edits // 4], seed)
+        print(f"{n:>8}{edits:>7}{full / edits * 1000:>10.2f}ms{fast / edits * 1000:>12.3f}ms{changed / edits:>10.0f}")
+
+
+def bench_cancellation(side=300, delays=(0.01, 0.05, 0.2)):
+    """Time how long a background query takes to stop after cancel(), for each search method."""
+    graph = grid_graph(side)
+    target = str(side * side - 1)
+    print(f"{'method':>13}" + "".join(f"{f'after {delay * 1000:.0f}ms':>14}" for delay in delays))
+    for method in GraphEngine.SEARCH_METHODS[:-1]:  # Building the hierarchy cannot be interrupted
+        row = []
+        for delay in delays:
+            engine = GraphEngine(cache_nodes=0)
+            engine.graph = graph
+            engine.pos = {str(i): (i // side, i % side) for i in range(side * side)}
+
+            def query(cancel_event=None):
+                _, path = engine.shortest_path('0', target, method, cancel_event)
+                return engine.find_alternate_paths('0', target, list(zip(path[:-1], path[1:])),
+                                                   cancel_event=cancel_event)
+
+            job = BackgroundQuery(query)
+            job.start()
+            time.sleep(delay)
+            start = time.perf_counter()
+            job.cancel()
+            job.thread.join()
+            result = job.queue.get()
+            seconds = time.perf_counter() - start
+            stopped = f"{seconds * 1000:.1f}ms" if isinstance(result, Exception) else "finished"
+            row.append(f"{stopped:>14}")
+        print(f"{method:>13}" + "".join(row))
+
+
+def bench_animation_trace(sides=(50, 100, 200), seeks=50):
+    """Time recording a Dijkstra trace against a plain search, and the cost of seeking in the recording."""
+    import matplotlib
+    matplotlib.use("Agg")
+    from animation import TraceAnimation
+
+    class NoRenderer:  # Only the overlay sizes are read when computing colors
+        def __init__(self, engine):
+            self.xy = range(len(engine.node_index))
+            self.segments = range(len(engine.edge_list))
+
+    print(f"{'nodes':>8}{'steps':>9}{'search':>10}{'record':>10}{'trace size':>12}{'per seek':>11}")
+    for side in sides:
+        engine = GraphEngine(cache_nodes=0)
+        engine.graph = grid_graph(side)
+        source, target = '0', str(side * side - 1)
+        search_time = timed(engine.shortest_path, source, target)
+        start = time.perf_counter()
+        trace = engine.trace_dijkstra(source, target)
+        record = time.perf_counter() - start
+        size = sum(a.itemsize * len(a) for a in (trace.kinds, trace.nodes, trace.edges, trace.distances))
+        animation = TraceAnimation(None, NoRenderer(engine), trace)
+        rng = random.Random(0)
+        seek = timed(lambda: [animation.colors(rng.randrange(len(trace) + 1)) for _ in range(seeks)]) / seeks
+        print(f"{side * side:>8}{len(trace):>9}{search_time:>9.3f}s{record:>9.3f}s{size / 2 ** 20:>10.2f}MB"
+              f"{seek * 1000:>9.2f}ms")
+
+
+def bench_render(sides=(30, 100, 200), full_detail_max=60):
+    """Time drawing a grid with every node, label and weight against the view-dependent renderer, and a pan."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    from renderer import GraphRenderer
+
+    print(f"{'nodes':>8}{'full detail':>13}{'renderer':>10}{'zoomed':>9}{'pan':>9}{'highlight':>11}")
+    for side in sides:
+        engine = GraphEngine()
+        engine.graph = grid_graph(side)
+        engine.pos = {str(i): (float(i % side), float(i // side)) for i in range(side * side)}
+        _, path = engine.shortest_path('0', str(side * side - 1))
+        highlights = [(path, list(zip(path[:-1], path[1:])), 'orange')]
+
+        full = '-'
+        if side <= full_detail_max:  # Drawing every weight label takes minutes on the larger grids
+            fig, ax = plt.subplots(figsize=(9, 7))
+            start = time.perf_counter()
+            nx.draw(engine.graph, engine.pos, ax=ax, with_labels=True, node_size=700)
+            nx.draw_networkx_edge_labels(engine.graph, engine.pos, ax=ax,
+                                         edge_labels=nx.get_edge_attributes(engine.graph, 'weight'))
+            fig.canvas.draw()
+            full = f"{time.perf_counter() - start:.3f}s"
+            plt.close(fig)
+
+        fig, ax = plt.subplots(figsize=(9, 7))
+        renderer = GraphRenderer(ax, fig.canvas)
+        engine.node_index  # Index the graph outside the timing, as the GUI does when it is loaded
+        start = time.perf_counter()
+        renderer.draw(engine, highlights)
+        overview = time.perf_counter() - start
+
+        def view(x, y, size=8):
+            ax.set_xlim(x, x + size)
+            ax.set_ylim(y, y + size)
+            fig.canvas.draw()
+
+        zoomed = timed(view, 0, 0)
+        pan = timed(view, 1, 1)
+        highlight = timed(renderer.draw, engine, [])
+        plt.close(fig)
+        print(f"{side * side:>8}{full:>13}{overview:>9.3f}s{zoomed * 1000:>7.0f}ms{pan * 1000:>7.0f}ms"
+              f"{highlight * 1000:>9.1f}ms")
+
+
+def bench_batch(n=20000, sources=32, targets=50, seed=0):
+    """Time batch many-to-many queries with a growing number of worker processes."""
+    engine = GraphEngine()
+    engine.graph = random_graph(n, seed)
+    rng = random.Random(seed)
+    pairs = [(str(rng.randrange(n)), str(rng.randrange(n))) for _ in range(sources)]
+    pairs = [(source, str(rng.randrange(n))) for source, _ in pairs for _ in range(targets)]
+
+    fd, snapshot = tempfile.mkstemp(suffix=".graph")
+    os.close(fd)
+    try:
+        engine.save_snapshot(snapshot)
+        cores = os.cpu_count() or 1
+        counts = sorted({1, cores} | {2 ** i for i in range(1, 8) if 2 ** i < cores})
+        print(f"{len(pairs)} pairs from {sources} sources on {n} nodes, {cores} cores available")
+        baseline = None
+        for workers in counts:
+            seconds = timed(lambda: list(batch.run_batch(snapshot, pairs, workers)))
+            baseline = baseline or seconds
+            print(f"{workers:>4} workers: {seconds:.3f}s (speed-up {baseline / seconds:.2f}x)")
+    finally:
+        os.remove(snapshot)
+
+
+IMPORT_CHECK = """
+import sys, time
+start = time.perf_counter()
+import graph_engine
+elapsed = time.perf_counter() - start
+gui_modules = sorted(m for m in ('tkinter', 'matplotlib') if m in sys.modules)
+print(elapsed, ','.join(gui_modules))
+"""
+
+
+def bench_import_time(repeat=5):
+    """Measure the cold import time of the headless engine and check it pulls in no GUI modules."""
+    timings = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, "-c", IMPORT_CHECK], capture_output=True, text=True, check=True)
+        elapsed, gui_modules = output.stdout.split(" ")
+        if gui_modules.strip():
+            raise AssertionError(f"graph_engine imported GUI modules: {gui_modules.strip()}")
+        timings.append(float(elapsed))
+    print(f"import graph_engine: best {min(timings) * 1000:.1f} ms over {repeat} runs, no tkinter/matplotlib")
+
+
+BENCHMARKS = {
+    "alternate-paths": bench_alternate_paths,
+    "compact-backend": bench_compact_backend,
+    "layout": bench_layout,
+    "highlight-lookup": bench_highlight_lookup,
+    "replacement-paths": bench_replacement_paths,
+    "path-cache": bench_path_cache,
+    "search-modes": bench_search_modes,
+    "contraction": bench_contraction,
+    "dynamic-updates": bench_dynamic_updates,
+    "cancellation": bench_cancellation,
+    "animation-trace": bench_animation_trace,
+    "render": bench_render,
+    "batch": bench_batch,
+    "import-time": bench_import_time,
+}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run visualizer benchmarks.")
+    parser.add_argument("names", nargs="*", metavar="name",
+                        help=f"Benchmarks to run: {', '.join(BENCHMARKS)} (default: all)")
+    args = parser.parse_args()
+    unknown = set(args.names) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(sorted(unknown))}")
+    for name in args.names or BENCHMARKS:
+        print(f"== {name} ==")
+        BENCHMARKS[name]()
@@ -0,0 +1,399 @@
+"""Reproducible benchmark suite for both Dijkstra Algorithm Visualizer variants.
+
+Every stage runs headless on the Agg backend, over seeded synthetic graphs of
+growing size:
+
+* grid: a square lattice with random integer weights.
+* geometric: a random geometric graph in the unit square, weighted by length.
+* scale-free: a Barabasi-Albert graph with random integer weights.
+* road: a jittered grid with missing streets and faster arterial roads,
+  weighted by travel time.
+
+Stages shared by both GUIs go through GraphEngine: CSV import, placing the
+nodes, a full spring layout and a plain shortest-path query. The stages of
+each variant call that module's own GraphLearningPlatform methods on a
+stand-in object holding an engine and a renderer. solve is its solve_query,
+which finds the shortest path with its kind of alternate paths. render is
+its first visualize_graph, and highlight its later ones.
+
+Each stage is timed repeat times. The median is kept, with garbage
+collection paused while timing. One further run is traced with tracemalloc
+for peak memory. Results go to a JSON file together with the commit and the
+package versions:
+
+    python benchmark_suite.py run --output before.json
+    git checkout <other commit>
+    python benchmark_suite.py run --output after.json
+    python benchmark_suite.py compare before.json after.json
+
+compare lists every stage that got slower or used more memory by more than
+the threshold, and exits with status 1 if there are any.
+"""
+import argparse
+import csv
+import gc
+import json
+import math
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import matplotlib
+matplotlib.use("Agg")  # Before anything imports pyplot
+import matplotlib.pyplot as plt
+import networkx as nx
+
+import dijkstra_alternate
+import dijkstra_test
+from graph_engine import GraphEngine
+from layout import RELAYOUT_MAX_NODES
+from profiling import profiler
+from renderer import GraphRenderer
+
+FORMAT_VERSION = 1
+SIZES = {
+    'small': (400, 1600),
+    'medium': (1000, 4000, 16000),
+    'large': (16000, 64000),
+}
+ALTERNATE_PATHS = 3  # k for dijkstra_test's alternate paths
+NOISE_FLOOR = 0.002  # Seconds; smaller changes are not reported as regressions
+
+
+def _relabel(graph, pos):
+    """Keep the largest component and relabel its nodes "0", "1", ..., matching imported graphs."""
+    component = max(nx.connected_components(graph), key=len)
+    mapping = {node: str(i) for i, node in enumerate(node for node in graph if node in component)}
+    graph = nx.relabel_nodes(graph.subgraph(component), mapping)
+    return graph, pos and {mapping[node]: pos[node] for node in mapping}
+
+
+def grid(n, seed=0):
+    """A square lattice of about n nodes with random integer weights."""
+    rng = random.Random(seed)
+    side = max(2, round(math.sqrt(n)))
+    graph = nx.grid_2d_graph(side, side)
+    for u, v in graph.edges():
+        graph[u][v]['weight'] = float(rng.randint(1, 10))
+    return _relabel(graph, {node: (float(node[0]), float(node[1])) for node in graph})
+
+
+def geometric(n, seed=0):
+    """A random geometric graph of n nodes, with a radius just above the connectivity threshold."""
+    radius = math.sqrt(1.5 * math.log(n) / (math.pi * n))
+    graph = nx.random_geometric_graph(n, radius, seed=seed)
+    pos = nx.get_node_attributes(graph, 'pos')
+    for u, v in graph.edges():
+        graph[u][v]['weight'] = round(100 * math.dist(pos[u], pos[v]), 2)
+    return _relabel(graph, pos)
+
+
+def scale_free(n, seed=0):
+    """A Barabasi-Albert graph of n nodes with random integer weights. It has no natural positions."""
+    rng = random.Random(seed)
+    graph = nx.barabasi_albert_graph(n, 2, seed=seed)
+    for u, v in graph.edges():
+        graph[u][v]['weight'] = float(rng.randint(1, 10))
+    return _relabel(graph, None)
+
+
+def road(n, seed=0):
+    """A jittered grid of about n nodes. A fifth of the streets are missing, and every 8th row and column is an
+    arterial road, never missing and 2.5 times as fast. Weights are travel times."""
+    rng = random.Random(seed)
+    side = max(2, round(math.sqrt(n)))
+    pos = {(i, j): (i + rng.uniform(-0.3, 0.3), j + rng.uniform(-0.3, 0.3)) for i in range(side) for j in range(side)}
+    graph = nx.Graph()
+    graph.add_nodes_from(pos)
+    for i, j in pos:
+        for a, b in ((i + 1, j), (i, j + 1)):
+            if (a, b) not in pos:
+                continue
+            arterial = j % 8 == 0 if a != i else i % 8 == 0
+            if arterial or rng.random() >= 0.2:
+                speed = 2.5 if arterial else 1.0
+                graph.add_edge((i, j), (a, b), weight=round(math.dist(pos[i, j], pos[a, b]) / speed, 3))
+    return _relabel(graph, pos)
+
+
+GENERATORS = {
+    'grid': grid,
+    'geometric': geometric,
+    'scale-free': scale_free,
+    'road': road,
+}
+
+
+def write_csv(graph, file_path):
+    """Write graph in the "Node,name" / "Edge,node1,node2,weight" format read by GraphEngine.import_csv."""
+    with open(file_path, 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(['Type', 'Name/Node1', 'Node2', 'Weight'])
+        writer.writerows(('Node', node) for node in graph)
+        writer.writerows(('Edge', u, v, w) for u, v, w in graph.edges(data='weight'))
+
+
+def measure(func, repeat, setup=None, teardown=None):
+    """Time func(*setup()) repeat times. Returns (median seconds, all runs, peak KiB of one traced run).
+
+    setup builds fresh arguments for each run and is not timed. teardown
+    gets the same arguments after each run.
+    """
+    def run(timed):
+        args = setup() if setup else ()
+        gc.collect()
+        try:
+            if timed:
+                gc.disable()
+                start = time.perf_counter()
+                func(*args)
+                return time.perf_counter() - start
+            tracemalloc.start()
+            func(*args)
+            return tracemalloc.get_traced_memory()[1] / 1024
+        finally:
+            gc.enable()
+            if tracemalloc.is_tracing():
+                tracemalloc.stop()
+            if teardown:
+                teardown(*args)
+
+    runs = [run(True) for _ in range(repeat)]
+    return statistics.median(runs), runs, run(False)
+
+
+def engine_for(graph, pos=None):
+    """Return a GraphEngine holding graph, indexed as the GUI would have it after loading."""
+    engine = GraphEngine()
+    engine.graph = graph.copy()
+    engine.node_index  # Built once when the graph is loaded, not per query
+    if pos is not None:
+        engine.pos = dict(pos)
+    return engine
+
+
+def platform_for(engine):
+    """A stand-in GraphLearningPlatform for calling the methods of either variant without tkinter."""
+    figure, ax = plt.subplots(figsize=(9, 7))
+    return SimpleNamespace(engine=engine, figure=figure, renderer=GraphRenderer(ax, figure.canvas),
+                           redraw_pending=None, master=None)
+
+
+def close(app):
+    plt.close(app.figure)
+
+
+def bench_graph(name, size, graph, pos, pairs, repeat, csv_path):
+    """Run every stage on one graph. Returns the result records."""
+    records = []
+
+    def record(variant, stage, func, setup=None, teardown=None):
+        try:
+            seconds, runs, peak = measure(func, repeat, setup, teardown)
+        except ImportError as exc:  # For example, spring_layout needs SciPy on larger graphs
+            entry = {'skipped': str(exc)}
+        else:
+            entry = {'seconds': seconds, 'runs': runs, 'peak_kib': round(peak, 1)}
+        records.append({'variant': variant, 'graph': name, 'size': size, 'nodes': graph.number_of_nodes(),
+                        'edges': graph.number_of_edges(), 'stage': stage, **entry})
+        shown = f"{entry['seconds'] * 1000:10.1f} ms {entry['peak_kib'] / 1024:8.1f} MiB" if 'seconds' in entry \
+            else f"skipped: {entry['skipped']}"
+        print(f"{variant:>18} {name:>10} {graph.number_of_nodes():>7} {stage:<17}{shown}", flush=True)
+
+    def queries(engine):
+        for source, target in pairs:
+            engine.shortest_path(source, target)
+
+    record('shared', 'import', lambda: GraphEngine().import_csv(csv_path))
+    record('shared', 'layout', GraphEngine.place_new_nodes, lambda: (engine_for(graph),))
+    if graph.number_of_nodes() <= RELAYOUT_MAX_NODES:
+        record('shared', 'relayout', GraphEngine.update_layout, lambda: (engine_for(graph, pos),))
+    record('shared', 'query', queries, lambda: (engine_for(graph),))
+
+    engine = engine_for(graph)
+    paths = [engine.shortest_path(source, target)[1] for source, target in pairs]
+    # The alternate path dijkstra_alternate would draw over each shortest path, if there is one
+    alternates = []
+    for path in paths:
+        found = engine.find_alternate_paths(path[0], path[-1], list(zip(path[:-1], path[1:])))
+        alternates.append(found[0][1] if found else path)
+
+    def solve_test(app):
+        for source, target in pairs:
+            dijkstra_test.GraphLearningPlatform.solve_query(app, source, target, 'dijkstra', ALTERNATE_PATHS)
+
+    def solve_alternate(app, restore_edges):
+        for source, target in pairs:
+            dijkstra_alternate.GraphLearningPlatform.solve_query(app, source, target, 'dijkstra', restore_edges)
+
+    record('dijkstra_test', 'solve', solve_test, lambda: (SimpleNamespace(engine=engine_for(graph)),))
+    record('dijkstra_alternate', 'solve', lambda app: solve_alternate(app, True),
+           lambda: (SimpleNamespace(engine=engine_for(graph)),))
+    record('dijkstra_alternate', 'solve_cumulative', lambda app: solve_alternate(app, False),
+           lambda: (SimpleNamespace(engine=engine_for(graph)),))
+
+    def show_test(app, i):
+        path = paths[i]
+        dijkstra_test.GraphLearningPlatform.visualize_graph(app, path, list(zip(path[:-1], path[1:])))
+
+    def show_alternate(app, i):
+        path, alternate = paths[i], alternates[i]
+        dijkstra_alternate.GraphLearningPlatform.visualize_graph(app, path, list(zip(path[:-1], path[1:])),
+                                                                 alternate, list(zip(alternate[:-1], alternate[1:])))
+
+    for variant, show in (('dijkstra_test', show_test), ('dijkstra_alternate', show_alternate)):
+        def drawn():
+            app = platform_for(engine_for(graph, pos))
+            if pos is None:
+                app.engine.place_new_nodes()
+            return (app,)
+
+        def first_draw(app, show=show):
+            show(app, 0)
+
+        def highlights(app, show=show):
+            for i in range(len(paths)):
+                show(app, i)
+
+        def drawn_once(drawn=drawn, show=show):
+            app, = drawn()
+            show(app, 0)
+            return (app,)
+
+        record(variant, 'render', first_draw, drawn, close)
+        record(variant, 'highlight', highlights, drawn_once, close)
+    return records
+
+
+def git_commit():
+    """Return (commit hash, whether the work tree has uncommitted changes), or (None, None) outside git."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=here, capture_output=True, text=True, check=True)
+        status = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=here,
+                                capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+    return commit.stdout.strip(), bool(status.stdout.strip())
+
+
+def run_suite(sizes, generators, queries=5, repeat=3, seed=0):
+    """Run the suite and return its results as a JSON-ready dict."""
+    profiler.disable()  # Spans would add their own time; DIJKSTRA_TRACE may have enabled them
+    commit, dirty = git_commit()
+    versions = {'networkx': nx.__version__, 'matplotlib': matplotlib.__version__}
+    try:
+        import numpy
+        versions['numpy'] = numpy.__version__
+    except ImportError:
+        pass
+    results = {
+        'format': FORMAT_VERSION,
+        'commit': commit,
+        'dirty': dirty,
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'packages': versions,
+        'settings': {'sizes': list(sizes), 'generators': list(generators), 'queries': queries, 'repeat': repeat,
+                     'seed': seed, 'alternate_paths': ALTERNATE_PATHS},
+        'results': [],
+    }
+    fd, csv_path = tempfile.mkstemp(suffix=".csv")
+    os.close(fd)
+    try:
+        for name in generators:
+            for size in sizes:
+                graph, pos = GENERATORS[name](size, seed)
+                rng = random.Random(seed)
+                nodes = list(graph)
+                pairs = [(rng.choice(nodes), rng.choice(nodes)) for _ in range(queries)]
+                write_csv(graph, csv_path)
+                results['results'].extend(bench_graph(name, size, graph, pos, pairs, repeat, csv_path))
+    finally:
+        os.remove(csv_path)
+    return results
+
+
+def _key(record):
+    return record['variant'], record['graph'], record['size'], record['stage']
+
+
+def compare(base, new, threshold=0.2):
+    """Print how every stage changed from base to new. Returns the (key, what) pairs that regressed."""
+    print(f"base: {base.get('commit')}{' (dirty)' if base.get('dirty') else ''}, "
+          f"new: {new.get('commit')}{' (dirty)' if new.get('dirty') else ''}")
+    if base.get('settings') != new.get('settings'):
+        print("warning: the two runs used different settings")
+    old = {_key(r): r for r in base['results'] if 'seconds' in r}
+    regressions = []
+    print(f"{'variant':>18} {'graph':>10} {'size':>6} {'stage':<17}{'base':>10}{'new':>10}{'time':>8}{'memory':>8}")
+    for record in new['results']:
+        before = old.get(_key(record))
+        if before is None or 'seconds' not in record:
+            continue
+        time_ratio = record['seconds'] / before['seconds'] if before['seconds'] else 1.0
+        memory_ratio = record['peak_kib'] / before['peak_kib'] if before['peak_kib'] else 1.0
+        flags = []
+        if time_ratio > 1 + threshold and record['seconds'] - before['seconds'] > NOISE_FLOOR:
+            flags.append('slower')
+        if memory_ratio > 1 + threshold and record['peak_kib'] - before['peak_kib'] > 64:
+            flags.append('more memory')
+        regressions.extend((_key(record), flag) for flag in flags)
+        print(f"{record['variant']:>18} {record['graph']:>10} {record['size']:>6} {record['stage']:<17}"
+              f"{before['seconds'] * 1000:>8.1f}ms{record['seconds'] * 1000:>8.1f}ms"
+              f"{time_ratio:>7.2f}x{memory_ratio:>7.2f}x  {', '.join(flags)}")
+    print(f"{len(regressions)} regression(s) beyond {threshold:.0%}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark both visualizer variants on synthetic graphs.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    run = commands.add_parser('run', help="run the suite and write the results as JSON")
+    run.add_argument('--sizes', default='medium',
+                     help=f"a preset ({', '.join(SIZES)}) or comma-separated node counts (default: medium)")
+    run.add_argument('--graphs', default=','.join(GENERATORS),
+                     help=f"comma-separated generators (default: {','.join(GENERATORS)})")
+    run.add_argument('--queries', type=int, default=5, help="source/target pairs per graph (default: 5)")
+    run.add_argument('--repeat', type=int, default=3, help="timed runs per stage; the median is kept (default: 3)")
+    run.add_argument('--seed', type=int, default=0)
+    run.add_argument('--output', help="JSON file to write (default: bench-<commit>.json)")
+    run.add_argument('--compare', metavar='BASE_JSON', help="compare against an earlier run when done")
+    run.add_argument('--threshold', type=float, default=0.2, help="relative change reported as a regression")
+    cmp = commands.add_parser('compare', help="compare two result files")
+    cmp.add_argument('base')
+    cmp.add_argument('new')
+    cmp.add_argument('--threshold', type=float, default=0.2, help="relative change reported as a regression")
+    args = parser.parse_args(argv)
+
+    if args.command == 'compare':
+        with open(args.base) as base, open(args.new) as new:
+            return 1 if compare(json.load(base), json.load(new), args.threshold) else 0
+
+    sizes = SIZES.get(args.sizes) or tuple(int(size) for size in args.sizes.split(','))
+    generators = args.graphs.split(',')
+    unknown = set(generators) - set(GENERATORS)
+    if unknown:
+        parser.error(f"unknown generator(s): {', '.join(sorted(unknown))}")
+    results = run_suite(sizes, generators, args.queries, args.repeat, args.seed)
+    output = args.output or f"bench-{(results['commit'] or 'nogit')[:10]}.json"
+    with open(output, 'w') as file:
+        json.dump(results, file, indent=1)
+    print(f"wrote {output}")
+    if args.compare:
+        with open(args.compare) as base:
+            return 1 if compare(json.load(base), results, args.threshold) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,237 @@
+"""Contraction Hierarchies for repeated shortest-path queries on a fixed graph.
+
+Preprocessing contracts the nodes one at a time, least important first.
+Contracting v removes it from the remaining graph. For each pair of its
+neighbours (u, x), a shortcut u-x with weight w(u, v) + w(v, x) is added,
+unless a short witness search finds another path that is no longer. Each
+node keeps its edges to the neighbours that were still present when it was
+contracted. These are its upward edges, and they lead to more important
+nodes.
+
+A query runs Dijkstra upwards from both ends and meets at the most important
+node of the shortest path, so only a small part of the graph is settled.
+Shortcuts remember the node they skip over, and are unpacked recursively
+into the original edges.
+
+Contraction stops as soon as the next node to contract, the one with the
+lowest priority, has many neighbours, as happens on random graphs with no
+hierarchy to find. The nodes still left form the core, even those with few
+neighbours. Their edges to each other lead upwards in both directions, so a
+query searches the core like plain bidirectional Dijkstra.
+
+The hierarchy works on the node ids of a CSRGraph and needs NumPy.
+"""
+from heapq import heapify, heappop, heappush
+from math import inf
+
+import numpy as np
+
+from search import Cancelled
+
+
+class ContractionHierarchy:
+    """The upward graph of a contracted undirected graph, stored as CSR arrays.
+
+    up_middle holds the node a shortcut skips over, or -1 for an original
+    edge.
+    """
+
+    WITNESS_SETTLE_LIMIT = 60  # Nodes a witness search may settle before a shortcut is added anyway
+    CORE_DEGREE = 24  # Contraction stops once the lowest-priority node has more neighbours than this
+
+    def __init__(self, up_indptr, up_indices, up_weights, up_middle):
+        # Plain ndarray views: slicing a numpy.memmap is several times slower
+        self.up_indptr = np.asarray(up_indptr)
+        self.up_indices = np.asarray(up_indices)
+        self.up_weights = np.asarray(up_weights)
+        self.up_middle = np.asarray(up_middle)
+
+    @classmethod
+    def build(cls, csr, cancel_event=None):
+        """Contract every node of a CSRGraph and return its hierarchy.
+
+        Raises search.Cancelled soon after cancel_event is set.
+        """
+        n = csr.number_of_nodes()
+        adj = [{} for _ in range(n)]  # Remaining graph: node -> {neighbour: (weight, middle)}
+        for u, v, w in csr.edges():
+            if u != v:
+                adj[u][v] = adj[v][u] = (w, -1)
+
+        contracted_neighbours = [0] * n
+        level = [0] * n  # Depth in the hierarchy, which keeps the contraction order balanced
+        heap = [(cls._priority(adj, v, cls._shortcuts(adj, v), contracted_neighbours, level), v) for v in range(n)]
+        heapify(heap)
+        up = [None] * n
+        while heap:
+            if cancel_event is not None and cancel_event.is_set():
+                raise Cancelled()
+            _, v = heappop(heap)
+            shortcuts = cls._shortcuts(adj, v)
+            priority = cls._priority(adj, v, shortcuts, contracted_neighbours, level)
+            if heap and priority > heap[0][0]:
+                heappush(heap, (priority, v))  # Lazy update: something else became cheaper
+                continue
+            if len(adj[v]) > cls.CORE_DEGREE:
+                break
+
+            up[v] = list(adj[v].items())
+            for u in adj[v]:
+                del adj[u][v]
+                contracted_neighbours[u] += 1
+                level[u] = max(level[u], level[v] + 1)
+            for u, x, weight in shortcuts:
+                if x not in adj[u] or weight < adj[u][x][0]:
+                    adj[u][x] = adj[x][u] = (weight, v)
+            adj[v] = None
+
+        for v in range(n):
+            if adj[v] is not None:  # Core node: its edges to the rest of the core lead both ways
+                up[v] = list(adj[v].items())
+        up_indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum([len(edges) for edges in up], out=up_indptr[1:])
+        flat = [(u, w, middle) for edges in up for u, (w, middle) in edges]
+        return cls(up_indptr,
+                   np.array([u for u, _, _ in flat], dtype=np.int32),
+                   np.array([w for _, w, _ in flat], dtype=np.float64),
+                   np.array([middle for _, _, middle in flat], dtype=np.int32))
+
+    @staticmethod
+    def _priority(adj, v, shortcuts, contracted_neighbours, level):
+        """Edge difference plus contracted neighbours and level: lower is contracted sooner."""
+        return len(shortcuts) - len(adj[v]) + contracted_neighbours[v] + level[v]
+
+    @classmethod
+    def _shortcuts(cls, adj, v):
+        """Return the (u, x, weight) shortcuts that contracting v would need."""
+        neighbours = list(adj[v].items())
+        shortcuts = []
+        for i, (u, (wu, _)) in enumerate(neighbours[:-1]):
+            targets = {x: wu + wx for x, (wx, _) in neighbours[i + 1:]}
+            dist = cls._witness_search(adj, u, v, targets, max(targets.values()))
+            shortcuts.extend((u, x, via) for x, via in targets.items() if dist.get(x, inf) > via)
+        return shortcuts
+
+    @classmethod
+    def _witness_search(cls, adj, source, skip, targets, max_dist):
+        """Dijkstra from source that avoids skip and gives up past max_dist or the settle limit."""
+        dist = {}
+        heap = [(0, source)]
+        remaining = len(targets)
+        while heap and len(dist) < cls.WITNESS_SETTLE_LIMIT:
+            d, v = heappop(heap)
+            if v in dist:
+                continue
+            if d > max_dist:
+                break
+            dist[v] = d
+            if v in targets:
+                remaining -= 1
+                if not remaining:
+                    break
+            for u, (w, _) in adj[v].items():
+                if u != skip and u not in dist:
+                    heappush(heap, (d + w, u))
+        return dist
+
+    def number_of_shortcuts(self):
+        """Return how many upward edges are shortcuts rather than original edges."""
+        return int(np.count_nonzero(np.asarray(self.up_middle) >= 0))
+
+    def up_edges(self, node):
+        """Return (neighbour, weight, middle) triples of a node's upward edges."""
+        start, end = self.up_indptr[node], self.up_indptr[node + 1]
+        return zip(self.up_indices[start:end].tolist(), self.up_weights[start:end].tolist(),
+                   self.up_middle[start:end].tolist())
+
+    def query(self, source, target, counters=None):
+        """Return (length, path, settled) between two node ids. length is inf and path None if there is no path.
+
+        A search.SearchCounters passed as counters gets the work done added to it.
+        """
+        if source == target:
+            return 0, [source], 1
+        dists = [{}, {}]
+        seen = [{source: 0}, {target: 0}]
+        preds = [{}, {}]  # Node -> (lower node, middle) of the upward edge it was reached by
+        heaps = [[(0, source)], [(0, target)]]
+        best, meet = inf, None
+        pushes, dropped, relaxed = 2, 0, 0
+        while heaps[0] or heaps[1]:
+            side = 0 if heaps[0] and (not heaps[1] or heaps[0][0][0] <= heaps[1][0][0]) else 1
+            d, v = heappop(heaps[side])
+            if d >= best:
+                dropped += len(heaps[side])
+                heaps[side] = []  # Nothing further up on this side can shorten the path
+                continue
+            if v in dists[side]:
+                continue
+            dists[side][v] = d
+            if v in dists[1 - side] and d + dists[1 - side][v] < best:
+                best, meet = d + dists[1 - side][v], v
+            edges = list(self.up_edges(v))
+            relaxed += len(edges)
+            if any(seen[side].get(u, inf) + w < d for u, w, _ in edges):
+                continue  # Stalled: v is reached more cheaply from above, so no shortest path climbs through it
+            for u, w, middle in edges:
+                vu_dist = d + w
+                if u not in dists[side] and vu_dist < seen[side].get(u, inf):
+                    seen[side][u] = vu_dist
+                    preds[side][u] = (v, middle)
+                    heappush(heaps[side], (vu_dist, u))
+                    pushes += 1
+
+        settled = len(dists[0]) + len(dists[1])
+        if counters is not None:
+            counters.add(settled, pushes, pushes - dropped)
+            counters.relaxed += relaxed
+        if meet is None:
+            return inf, None, settled
+        forward = self._unpack_chain(preds[0], meet)
+        backward = self._unpack_chain(preds[1], meet)
+        return best, self._drop_cycles(forward + backward[::-1][1:]), settled
+
+    @staticmethod
+    def _drop_cycles(path):
+        """Cut any cycle out of path. On a shortest path these only run over zero-weight edges."""
+        position = {}
+        result = []
+        for node in path:
+            if node in position:
+                for removed in result[position[node] + 1:]:
+                    del position[removed]
+                del result[position[node] + 1:]
+            else:
+                position[node] = len(result)
+                result.append(node)
+        return result
+
+    def _unpack_chain(self, pred, node):
+        """Return the original nodes from the root of pred up to node."""
+        path = [node]
+        while node in pred:
+            lower, middle = pred[node]
+            path.extend(reversed(self._unpack(lower, node, middle)[:-1]))
+            node = lower
+        path.reverse()
+        return path
+
+    def _unpack(self, a, b, middle):
+        """Expand the upward edge a-b into the original nodes from a to b."""
+        path = [a]
+        stack = [(a, b, middle)]
+        while stack:
+            x, y, m = stack.pop()
+            if m < 0:
+                path.append(y)
+            else:  # The skipped node m was contracted before x and y, so both edges are upward from m
+                stack.append((m, y, self._middle(m, y)))
+                stack.append((x, m, self._middle(m, x)))
+        return path
+
+    def _middle(self, low, high):
+        """Return the middle of the upward edge from low to high."""
+        for u, _, middle in self.up_edges(low):
+            if u == high:
+                return middle
+        raise KeyError((low, high))
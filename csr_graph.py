@@ -0,0 +1,98 @@
+"""Compact compressed-sparse-row graph backend with its own Dijkstra kernel.
+
+A CSRGraph is an immutable snapshot of a networkx graph. Nodes get integer ids
+in graph iteration order. The adjacency is stored in three NumPy arrays:
+indptr, indices and weights. For a directed graph they hold the out-edges.
+Neighbours keep the order of the networkx adjacency dicts, and the kernel
+breaks ties the same way networkx does, so results match
+nx.single_source_dijkstra exactly.
+"""
+from math import inf
+
+import numpy as np
+
+from search import dijkstra, unwind
+
+
+class CSRGraph:
+    """Immutable compressed-sparse-row form of a weighted graph."""
+
+    def __init__(self, labels, indptr, indices, weights, index=None, directed=False):
+        self.labels = labels  # Node id -> label
+        self.indptr = indptr  # Neighbours of node i are indices[indptr[i]:indptr[i + 1]]
+        self.indices = indices
+        self.weights = weights
+        self._index = index
+        self.directed = directed
+
+    @classmethod
+    def from_networkx(cls, graph, weight='weight'):
+        """Freeze a networkx graph into CSR arrays."""
+        labels = list(graph)
+        index = {label: i for i, label in enumerate(labels)}
+        adj = graph.adj
+        indptr = np.zeros(len(labels) + 1, dtype=np.int64)
+        np.cumsum([len(adj[label]) for label in labels], out=indptr[1:])
+        nnz = int(indptr[-1])
+        indices = np.fromiter((index[v] for label in labels for v in adj[label]), dtype=np.int32, count=nnz)
+        weights = np.fromiter((d.get(weight, 1) for label in labels for d in adj[label].values()),
+                              dtype=np.float64, count=nnz)
+        return cls(labels, indptr, indices, weights, index=index, directed=graph.is_directed())
+
+    def to_networkx(self, graph):
+        """Fill an empty networkx graph with the nodes and weighted edges of this CSR graph."""
+        labels = list(self.labels)
+        graph.add_nodes_from(labels)
+        graph.add_weighted_edges_from((labels[u], labels[v], w) for u, v, w in self.edges())
+        return graph
+
+    def edges(self):
+        """Return (u, v, weight) for every edge once, with u <= v unless the graph is directed."""
+        sources = np.repeat(np.arange(self.number_of_nodes()), np.diff(self.indptr))
+        if self.directed:
+            return zip(sources.tolist(), self.indices.tolist(), self.weights.tolist())
+        keep = sources <= self.indices  # Each undirected edge is stored in both directions
+        return zip(sources[keep].tolist(), self.indices[keep].tolist(), self.weights[keep].tolist())
+
+    def reverse(self):
+        """Return the graph with every edge turned around. Node ids and labels are shared.
+
+        An undirected graph is its own reverse.
+        """
+        if not self.directed:
+            return self
+        n = self.number_of_nodes()
+        sources = np.repeat(np.arange(n, dtype=np.int32), np.diff(self.indptr))
+        order = np.argsort(self.indices, kind='stable')  # Keeps each node's in-edges in source order
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.indices, minlength=n), out=indptr[1:])
+        return CSRGraph(self.labels, indptr, sources[order], np.asarray(self.weights)[order], index=self._index,
+                        directed=True)
+
+    @property
+    def index(self):
+        """Label -> node id mapping, built on first use."""
+        if self._index is None:
+            self._index = {label: i for i, label in enumerate(self.labels)}
+        return self._index
+
+    def number_of_nodes(self):
+        """Return the number of nodes."""
+        return len(self.indptr) - 1
+
+    def neighbors(self, node):
+        """Return (neighbour id, weight) pairs of a node id."""
+        start, end = self.indptr[node], self.indptr[node + 1]
+        return zip(self.indices[start:end].tolist(), self.weights[start:end].tolist())
+
+    def dijkstra(self, source, target=None, banned=None):
+        """Run Dijkstra's algorithm from a source node id. See search.dijkstra."""
+        return dijkstra(self.neighbors, source, target, banned)
+
+    def shortest_path(self, source, target, banned=None):
+        """Return (length, path) between two node ids, or (inf, None) if target is unreachable."""
+        dist, pred = self.dijkstra(source, target, banned)
+        if target not in dist:
+            return inf, None
+        return dist[target], unwind(pred, target)
+
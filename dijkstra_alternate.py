@@ -1,18 +1,24 @@
+import argparse
+import queue
 import tkinter as tk
 from tkinter import ttk
 import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
 import networkx as nx
+from animation import TraceAnimation
+from graph_engine import BackgroundQuery, GraphEngine
+from profiling import profiler
+from layout import BackgroundRelayout
+from renderer import HIGHLIGHT_COLOR, GraphRenderer
 
 class GraphLearningPlatform:
-    def __init__(self, master):
+    def __init__(self, master, directed=False, multigraph=False):
         self.master = master
         self.master.title("Dijkstra Algorithm Visualizer")
         self.master.geometry("1000x700")  # Increased size for better visualization
 
-        # Graph structure
-        self.graph = nx.Graph()
-        self.pos = {}  # To store the node positions
+        # Graph structure and shortest-path queries
+        self.engine = GraphEngine(directed=directed, multigraph=multigraph)
 
         # Title Label
         self.title_label = ttk.Label(master, text="Dijkstra Algorithm Visualizer", font=("Helvetica", 16))
@@ -31,7 +37,16 @@ class GraphLearningPlatform:
         self.add_node_button = ttk.Button(self.input_frame, text="Add Node", command=self.add_node)
         self.add_node_button.grid(row=0, column=2, padx=5)
 
-        self.edge_label = ttk.Label(self.input_frame, text="Edge (node1,node2,weight):")
+        self.relayout_button = ttk.Button(self.input_frame, text="Relayout", command=self.relayout)
+        self.relayout_button.grid(row=0, column=3, padx=5)
+
+        self.layout_status_label = ttk.Label(self.input_frame, text="")
+        self.layout_status_label.grid(row=0, column=4, padx=5)
+
+        # Full layout running on a worker thread, if any
+        self.background_relayout = None
+
+        self.edge_label = ttk.Label(self.input_frame, text=self.edge_prompt())
         self.edge_label.grid(row=1, column=0)
 
         self.edge_entry = ttk.Entry(self.input_frame, width=20)
@@ -59,6 +74,68 @@ class GraphLearningPlatform:
         self.run_algorithm_button = ttk.Button(self.control_frame, text="Run Dijkstra's Algorithm", command=self.run_algorithm)
         self.run_algorithm_button.grid(row=0, column=4, padx=5)
 
+        self.cancel_query_button = ttk.Button(self.control_frame, text="Cancel", command=self.cancel_query,
+                                              state=tk.DISABLED)
+        self.cancel_query_button.grid(row=1, column=4, padx=5)
+
+        # Query running on a worker thread, if any; starting another one supersedes it
+        self.background_query = None
+
+        # Restore each removed edge before removing the next, instead of removing them cumulatively
+        self.restore_edges = tk.BooleanVar(value=True)
+        self.restore_edges_check = ttk.Checkbutton(self.control_frame, text="Restore each edge",
+                                                   variable=self.restore_edges)
+        self.restore_edges_check.grid(row=0, column=5, padx=5)
+
+        # Search engine used for the shortest path
+        self.search_method_label = ttk.Label(self.control_frame, text="Search:")
+        self.search_method_label.grid(row=0, column=6)
+
+        self.search_method = tk.StringVar(value='dijkstra')
+        self.search_method_combobox = ttk.Combobox(self.control_frame, textvariable=self.search_method,
+                                                   values=self.engine.search_methods, state='readonly', width=12)
+        self.search_method_combobox.grid(row=0, column=7, padx=5)
+
+        # Keep the shortest-path tree of the last query up to date as edges are edited
+        self.incremental = tk.BooleanVar(value=self.engine.incremental)
+        self.incremental_check = ttk.Checkbutton(self.control_frame, text="Incremental", variable=self.incremental,
+                                                 command=self.toggle_incremental)
+        self.incremental_check.grid(row=0, column=8, padx=5)
+
+        # Source and target of the displayed shortest path, refreshed after edits in incremental mode
+        self.current_query = None
+
+        # Redraw scheduled with after(), so a burst of edits is drawn once
+        self.redraw_pending = None
+
+        # Step-by-step animation of Dijkstra's algorithm, replayed from a recorded trace
+        self.animation_frame = ttk.Frame(master)
+        self.animation_frame.pack(pady=5)
+
+        self.animate_button = ttk.Button(self.animation_frame, text="Animate", command=self.animate)
+        self.animate_button.grid(row=0, column=0, padx=5)
+
+        self.play_button = ttk.Button(self.animation_frame, text="Play", command=self.toggle_play, state=tk.DISABLED)
+        self.play_button.grid(row=0, column=1, padx=5)
+
+        self.animation_position = tk.DoubleVar(value=0)
+        self.animation_scale = ttk.Scale(self.animation_frame, from_=0, to=0, length=300,
+                                         variable=self.animation_position, command=self.seek_animation)
+        self.animation_scale.grid(row=0, column=2, padx=5)
+
+        self.animation_speed_label = ttk.Label(self.animation_frame, text="Steps/s:")
+        self.animation_speed_label.grid(row=0, column=3)
+
+        self.animation_speed = tk.IntVar(value=50)
+        self.animation_speed_spinbox = ttk.Spinbox(self.animation_frame, from_=1, to=100000, increment=10, width=7,
+                                                   textvariable=self.animation_speed, command=self.set_animation_speed)
+        self.animation_speed_spinbox.grid(row=0, column=4)
+
+        self.animation_status_label = ttk.Label(self.animation_frame, text="")
+        self.animation_status_label.grid(row=0, column=5, padx=5)
+
+        self.animation = None
+
         # Result Frame
         self.result_frame = ttk.Frame(master)
         self.result_frame.pack(pady=10)
@@ -82,18 +159,66 @@ class GraphLearningPlatform:
         self.figure, self.ax = plt.subplots(figsize=(9, 7))  # Larger figure size for better visualization
         self.canvas = FigureCanvasTkAgg(self.figure, master=self.master)
         self.canvas.get_tk_widget().pack(pady=10)
+        # Pan and zoom; the wheel zooms too
+        self.toolbar = NavigationToolbar2Tk(self.canvas, self.master, pack_toolbar=False)
+        self.toolbar.update()
+        self.toolbar.pack()
+        self.renderer = GraphRenderer(self.ax, self.canvas)
+
+        # Timings of the last query, layout and draw, shown while profiling is enabled
+        self.profile_label = ttk.Label(master, text="", anchor=tk.W)
+        if profiler.enabled:
+            self.profile_label.pack(side=tk.BOTTOM, fill=tk.X, padx=5, before=self.title_label)  # Keeps its space
 
         self.master.protocol("WM_DELETE_WINDOW", self.on_closing)
 
+    @property
+    def graph(self):
+        """The graph held by the engine."""
+        return self.engine.graph
+
+    @property
+    def pos(self):
+        """The node positions held by the engine."""
+        return self.engine.pos
+
     def add_node(self):
         """Add a node to the graph."""
         node = self.node_entry.get()
-        if node:
-            self.graph.add_node(node)
+        if self.engine.add_node(node):
+            self.cancel_query()  # Its result would be for the old graph
             self.node_entry.delete(0, tk.END)
-            # Update node positions only when adding nodes
-            self.pos = nx.spring_layout(self.graph, k=1.2, iterations=50)
-            self.visualize_graph()
+            # Place only the new node; existing nodes keep their positions
+            self.engine.place_new_nodes()
+            self.request_redraw()
+
+    def relayout(self):
+        """Run a full spring layout in the background and redraw when it finishes."""
+        if self.background_relayout is None:
+            self.background_relayout = BackgroundRelayout(self.graph, self.pos)
+            self.relayout_button.config(state=tk.DISABLED)
+            self.layout_status_label.config(text="")
+            self.background_relayout.start()
+            self.master.after(50, self.poll_relayout)
+
+    def poll_relayout(self):
+        """Apply the background layout once it is done."""
+        job = self.background_relayout
+        if not job.done():
+            self.master.after(50, self.poll_relayout)
+            return
+        self.background_relayout = None
+        self.relayout_button.config(state=tk.NORMAL)
+        if job.error is not None:
+            self.layout_status_label.config(text=f"Relayout failed: {job.error}")  # The old positions stay
+            return
+        self.engine.pos = job.result
+        self.engine.place_new_nodes()  # Nodes added while the layout was running
+        self.request_redraw()
+
+    def edge_prompt(self):
+        """Text for the edge entry label, naming the direction when edges are one-way."""
+        return "Edge (from,to,weight):" if self.engine.directed else "Edge (node1,node2,weight):"
 
     def add_edge(self):
         """Add an edge to the graph with a weight."""
@@ -101,89 +226,202 @@ class GraphLearningPlatform:
         if len(edge_input) == 3:
             node1, node2, weight = edge_input
             try:
-                weight = float(weight)
-                if node1 in self.graph and node2 in self.graph:
-                    self.graph.add_edge(node1, node2, weight=weight)
+                if self.engine.add_edge(node1, node2, weight):
+                    self.cancel_query()  # Its result would be for the old graph
                     self.edge_entry.delete(0, tk.END)
-                    self.visualize_graph()  # Update the graph visualization with same node positions
+                    if self.engine.incremental and self.current_query and self.search_method.get() == 'dijkstra':
+                        self.refresh_path()
+                    else:
+                        self.request_redraw()  # Update the graph visualization with same node positions
             except ValueError:
                 print("Invalid weight entered")
 
-    def visualize_graph(self, path_nodes=None, path_edges=None, alternate_path_nodes=None, alternate_path_edges=None):
-        """Visualize the current graph."""
-        self.ax.clear()  # Clear previous plot
-        if self.graph.number_of_nodes() == 0:
-            self.ax.set_title("Graph Visualization")
-            self.canvas.draw()
-            return
+    def toggle_incremental(self):
+        """Switch the engine's incremental shortest-path maintenance on or off."""
+        self.engine.incremental = self.incremental.get()
+
+    def refresh_path(self):
+        """Show the updated shortest path of the current query straight after an edit.
+
+        The alternate paths are cleared, since they were found on the old graph.
+        """
+        self.start_query(self.show_result, self.solve_refresh, *self.current_query)
+
+    def solve_refresh(self, source, target, cancel_event=None):
+        """Read the current query's path from the incrementally updated tree. Runs on a worker thread."""
+        path_length, path = self.engine.shortest_path(source, target, cancel_event=cancel_event)
+        return path_length, path, f"{self.engine.last_changed} nodes updated", []
 
-        # Set default node and edge colors
-        node_colors = ['lightblue' for node in self.graph.nodes()]
-        edge_colors = ['black' for edge in self.graph.edges()]
+    def request_redraw(self):
+        """Redraw the graph shortly, once for a whole burst of edits."""
+        if self.redraw_pending is None:
+            self.redraw_pending = self.master.after(30, self.visualize_graph)
 
-        # Highlight the shortest path nodes and edges if provided
+    def visualize_graph(self, path_nodes=None, path_edges=None, alternate_path_nodes=None, alternate_path_edges=None):
+        """Visualize the current graph, highlighting the shortest path and an alternate path."""
+        if self.redraw_pending is not None:
+            self.master.after_cancel(self.redraw_pending)  # This draw covers it
+            self.redraw_pending = None
+        highlights = []
         if path_nodes is not None:
-            for node in path_nodes:
-                node_colors[list(self.graph.nodes()).index(node)] = 'orange'
-            for edge in path_edges:
-                edge_colors[list(self.graph.edges()).index(edge)] = 'orange'
-
-        # Highlight the alternate path nodes and edges if provided
-        if alternate_path_nodes is not None:
-            for node in alternate_path_nodes:
-                node_colors[list(self.graph.nodes()).index(node)] = 'blue'
-        if alternate_path_edges is not None:
-            for edge in alternate_path_edges:
-                edge_colors[list(self.graph.edges()).index(edge)] = 'blue'
-
-        # Draw the graph with the updated node and edge colors
-        nx.draw(self.graph, self.pos, with_labels=True, node_color=node_colors, edge_color=edge_colors,
-                node_size=700, font_size=12, font_color='black', font_weight='bold')
-
-        # Draw edge labels (weights)
-        edge_labels = nx.get_edge_attributes(self.graph, 'weight')
-        nx.draw_networkx_edge_labels(self.graph, self.pos, edge_labels=edge_labels, font_color='red', font_size=10)
-
-        self.ax.set_title("Graph Visualization")
-        self.canvas.draw()  # Update the canvas
+            highlights.append((path_nodes, path_edges, HIGHLIGHT_COLOR))
+        if alternate_path_nodes is not None or alternate_path_edges is not None:
+            highlights.append((alternate_path_nodes, alternate_path_edges, 'blue'))
+        self.renderer.draw(self.engine, highlights)
+        if profiler.enabled:
+            self.profile_label.config(text=profiler.summary())
 
     def run_algorithm(self):
-        """Run Dijkstra's algorithm and display the shortest path and alternate paths."""
+        """Run Dijkstra's algorithm on a worker thread and display the shortest path and alternate paths."""
         source = self.source_entry.get()
         target = self.target_entry.get()
 
         if source not in self.graph or target not in self.graph:
             self.path_length_label.config(text="Source or target node not found in graph.")
             return
-
+        self.current_query = (source, target)
+        self.stop_animation()
+        if self.search_method.get() == 'astar':
+            self.engine.place_new_nodes()  # A* reads the positions on the worker thread, which must not place nodes
+        self.start_query(self.show_result, self.solve_query, source, target, self.search_method.get(),
+                         self.restore_edges.get())
+
+    def solve_query(self, source, target, method, restore_edges, cancel_event=None):
+        """Find the shortest path and the alternate paths avoiding its edges. Runs on a worker thread."""
+        path_length, path = self.engine.shortest_path(source, target, method, cancel_event=cancel_event)
+        settled = self.engine.last_settled
+        # Find alternate routes by removing the shortest path edges
+        path_edges = list(zip(path[:-1], path[1:]))
+        alternate_paths = self.engine.find_alternate_paths(source, target, path_edges, restore_edges=restore_edges,
+                                                           cancel_event=cancel_event)
+        return path_length, path, f"{settled} nodes settled", alternate_paths
+
+    def start_query(self, on_result, func, *args):
+        """Run func(*args) on a worker thread and pass its result to on_result, superseding any running query."""
+        self.cancel_query()
+        self.background_query = BackgroundQuery(func, *args)
+        self.cancel_query_button.config(state=tk.NORMAL)
+        self.path_length_label.config(text="Running...")
+        self.background_query.start()
+        self.master.after(50, self.poll_query, self.background_query, on_result)
+
+    def poll_query(self, job, on_result):
+        """Hand the result of a finished query to on_result, unless it was cancelled or superseded."""
+        if job is not self.background_query:
+            return
         try:
-            # Get the shortest path
-            path_length, path = nx.single_source_dijkstra(self.graph, source, target=target)
-            self.path_length_label.config(text=f"Shortest Path Length: {path_length}")
-            self.final_path_label.config(text=f"Final Path: {' -> '.join(path)}")
+            result = job.queue.get_nowait()
+        except queue.Empty:
+            self.master.after(50, self.poll_query, job, on_result)
+            return
+        self.background_query = None
+        self.cancel_query_button.config(state=tk.DISABLED)
+        on_result(result)
+
+    def cancel_query(self):
+        """Stop the running query, if any, and discard its result."""
+        if self.background_query is not None:
+            self.background_query.cancel()
+            self.background_query = None
+            self.cancel_query_button.config(state=tk.DISABLED)
+            self.path_length_label.config(text="Query cancelled.")
+
+    def show_result(self, result):
+        """Display the (length, path, note, alternate paths) found by a query, or the error it raised."""
+        if isinstance(result, nx.NetworkXNoPath):
+            self.path_length_label.config(text="No path exists between the source and target.")
+            self.final_path_label.config(text="")
+            self.display_alternate_paths([])
+            self.visualize_graph()
+            return
+        if isinstance(result, Exception):
+            self.path_length_label.config(text=f"Query failed: {result}")
+            return
+        path_length, path, note, alternate_paths = result
+        self.path_length_label.config(text=f"Shortest Path Length: {path_length} ({note})")
+        self.final_path_label.config(text=f"Final Path: {' -> '.join(path)}")
 
-            # Create a hyperlink for the shortest path
-            if self.shortest_path_link is not None:
-                self.shortest_path_link.destroy()  # Remove the previous link if it exists
+        # Create a hyperlink for the shortest path
+        if self.shortest_path_link is not None:
+            self.shortest_path_link.destroy()  # Remove the previous link if it exists
 
-            self.shortest_path_link = ttk.Label(self.result_frame, text=f"Shortest Path: {' -> '.join(path)}",
-                                                 foreground="blue", cursor="hand2", font=("Helvetica", 10, "underline"))
-            self.shortest_path_link.pack()
-            self.shortest_path_link.bind("<Button-1>", lambda e: self.highlight_shortest_path(path))
+        self.shortest_path_link = ttk.Label(self.result_frame, text=f"Shortest Path: {' -> '.join(path)}",
+                                            foreground="blue", cursor="hand2", font=("Helvetica", 10, "underline"))
+        self.shortest_path_link.pack()
+        self.shortest_path_link.bind("<Button-1>", lambda e: self.highlight_shortest_path(path))
 
-            # Highlight the shortest path nodes and edges
-            path_nodes = path
-            path_edges = list(zip(path[:-1], path[1:]))
+        # Visualize the graph with highlighted shortest path nodes and edges
+        self.highlight_shortest_path(path)
 
-            # Visualize the graph with highlighted shortest path nodes and edges
-            self.visualize_graph(path_nodes=path_nodes, path_edges=path_edges)
+        # Display the alternate routes found by removing the shortest path edges
+        self.display_alternate_paths(alternate_paths)
 
-            # Find and display alternate routes by removing the shortest path edges
-            self.find_alternate_paths(source, target, path_edges)
+    def animate(self):
+        """Record Dijkstra's algorithm on a worker thread, then play it back step by step."""
+        source = self.source_entry.get()
+        target = self.target_entry.get()
 
-        except nx.NetworkXNoPath:
-            self.path_length_label.config(text="No path exists between the source and target.")
+        if source not in self.graph or target not in self.graph:
+            self.path_length_label.config(text="Source or target node not found in graph.")
             return
+        self.stop_animation()
+        self.start_query(self.start_animation, self.engine.trace_dijkstra, source, target)
+
+    def start_animation(self, trace):
+        """Play a recorded SearchTrace from the start."""
+        if isinstance(trace, Exception):
+            self.path_length_label.config(text=f"Query failed: {trace}")
+            return
+        if trace.path is None:
+            self.path_length_label.config(text="No path exists between the source and target.")
+        else:
+            self.path_length_label.config(text=f"Shortest Path Length: {trace.length} "
+                                          f"({self.engine.last_settled} nodes settled)")
+        self.visualize_graph()  # Bring the renderer up to date with the recorded node and edge positions
+        self.animation = TraceAnimation(self.master, self.renderer, trace, on_frame=self.show_animation_frame)
+        self.set_animation_speed()
+        self.animation_scale.config(to=len(trace))
+        self.play_button.config(state=tk.NORMAL, text="Pause")
+        self.animation.play()
+
+    def show_animation_frame(self, position):
+        """Move the slider and the step counter along with the animation."""
+        self.animation_position.set(position)
+        self.animation_status_label.config(text=f"Step {position} / {len(self.animation)}")
+        if not self.animation.playing:
+            self.play_button.config(text="Play")
+
+    def toggle_play(self):
+        """Pause the animation, or resume it."""
+        if self.animation.playing:
+            self.animation.pause()
+            self.play_button.config(text="Play")
+        else:
+            self.animation.play()
+            self.play_button.config(text="Pause")
+
+    def seek_animation(self, value):
+        """Pause the animation and show the step picked on the slider."""
+        if self.animation is not None and int(float(value)) != self.animation.position:
+            self.animation.pause()
+            self.play_button.config(text="Play")
+            self.animation.seek(float(value))
+
+    def set_animation_speed(self):
+        """Apply the steps per second from the speed box."""
+        if self.animation is not None:
+            try:
+                self.animation.speed = max(1, self.animation_speed.get())
+            except tk.TclError:
+                pass  # Not a number; keep the current speed
+
+    def stop_animation(self):
+        """Stop the animation and forget its trace."""
+        if self.animation is not None:
+            self.animation.pause()
+            self.animation = None
+            self.play_button.config(state=tk.DISABLED, text="Play")
+            self.animation_status_label.config(text="")
 
     def highlight_shortest_path(self, path):
         """Highlight the selected shortest path in the visualization."""
@@ -191,29 +429,14 @@ class GraphLearningPlatform:
         path_nodes = path
         self.visualize_graph(path_nodes=path_nodes, path_edges=path_edges)
 
-    def find_alternate_paths(self, source, target, path_edges):
-        """Find alternate paths by removing the edges of the found shortest path."""
-        alternate_paths = []
-        G_temp = self.graph.copy()
-
-        # Remove the edges of the shortest path one by one and find alternate paths
-        for edge in path_edges:
-            G_temp.remove_edge(*edge)
-            try:
-                path_length, path = nx.single_source_dijkstra(G_temp, source, target=target)
-                alternate_paths.append((path_length, path))
-            except nx.NetworkXNoPath:
-                continue
-
+    def display_alternate_paths(self, alternate_paths):
+        """Display (length, path) alternate paths as clickable links."""
         # Clear previous alternate path labels
         for link in self.alternate_path_links:
             link.destroy()
         self.alternate_path_links.clear()
 
         if alternate_paths:
-            # Sort alternate paths by their length
-            alternate_paths = sorted(alternate_paths, key=lambda x: x[0])
-
             # Display and visualize alternate paths as clickable hyperlinks
             for idx, (path_length, path) in enumerate(alternate_paths):
                 alt_path_label = ttk.Label(self.result_frame, text=f"Alternate Path {idx + 1}: {' -> '.join(path)}",
@@ -230,9 +453,21 @@ class GraphLearningPlatform:
 
     def on_closing(self):
         """Handle window close event."""
+        self.cancel_query()
         self.master.destroy()
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Dijkstra Algorithm Visualizer with edge-removal alternate paths.")
+    parser.add_argument("--profile", action="store_true", help="show query, layout and drawing timings in a status bar")
+    parser.add_argument("--trace", metavar="FILE",
+                        help="append timing spans to FILE as JSON lines (or set the DIJKSTRA_TRACE variable)")
+    parser.add_argument("--directed", action="store_true", help="make edges one-way links from their first node")
+    parser.add_argument("--multigraph", action="store_true",
+                        help="keep parallel edges between two nodes; searches use the lightest")
+    args = parser.parse_args()
+    if args.profile or args.trace:
+        profiler.enable(args.trace or profiler.trace_path)
+
     root = tk.Tk()
-    app = GraphLearningPlatform(root)
+    app = GraphLearningPlatform(root, directed=args.directed, multigraph=args.multigraph)
     root.mainloop()
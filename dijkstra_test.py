@@ -1,19 +1,26 @@
+import argparse
+import queue
 import tkinter as tk
 from tkinter import ttk, filedialog
 import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
 import networkx as nx
-import csv
+import batch
+from animation import TraceAnimation
+from graph_engine import BackgroundQuery, GraphEngine
+from profiling import profiler
+from layout import RELAYOUT_MAX_NODES, BackgroundRelayout
+from renderer import HIGHLIGHT_COLOR, GraphRenderer
+from graph_io import BackgroundImport, ImportReport
 
 class GraphLearningPlatform:
-    def __init__(self, master):
+    def __init__(self, master, max_alternate_paths=3, directed=False, multigraph=False):
         self.master = master
         self.master.title("Dijkstra Algorithm Visualizer")
         self.master.geometry("1000x700")  # Increased size for better visualization
 
-        # Graph structure
-        self.graph = nx.Graph()
-        self.pos = {}  # To store the node positions
+        # Graph structure and shortest-path queries
+        self.engine = GraphEngine(directed=directed, multigraph=multigraph)
 
         # Title Label
         self.title_label = ttk.Label(master, text="Dijkstra Algorithm Visualizer", font=("Helvetica", 16))
@@ -32,7 +39,13 @@ class GraphLearningPlatform:
         self.add_node_button = ttk.Button(self.input_frame, text="Add Node", command=self.add_node)
         self.add_node_button.grid(row=0, column=2, padx=5)
 
-        self.edge_label = ttk.Label(self.input_frame, text="Edge (node1,node2,weight):")
+        self.relayout_button = ttk.Button(self.input_frame, text="Relayout", command=self.relayout)
+        self.relayout_button.grid(row=0, column=3, padx=5)
+
+        # Full layout running on a worker thread, if any
+        self.background_relayout = None
+
+        self.edge_label = ttk.Label(self.input_frame, text=self.edge_prompt())
         self.edge_label.grid(row=1, column=0)
 
         self.edge_entry = ttk.Entry(self.input_frame, width=20)
@@ -60,6 +73,70 @@ class GraphLearningPlatform:
         self.run_algorithm_button = ttk.Button(self.control_frame, text="Run Dijkstra's Algorithm", command=self.run_algorithm)
         self.run_algorithm_button.grid(row=0, column=4, padx=5)
 
+        self.cancel_query_button = ttk.Button(self.control_frame, text="Cancel", command=self.cancel_query,
+                                              state=tk.DISABLED)
+        self.cancel_query_button.grid(row=1, column=4, padx=5)
+
+        # Query running on a worker thread, if any; starting another one supersedes it
+        self.background_query = None
+
+        self.alternate_count_label = ttk.Label(self.control_frame, text="Alternate Paths:")
+        self.alternate_count_label.grid(row=0, column=5)
+
+        self.alternate_count = tk.IntVar(value=max_alternate_paths)
+        self.alternate_count_spinbox = ttk.Spinbox(self.control_frame, from_=0, to=50, width=4,
+                                                   textvariable=self.alternate_count)
+        self.alternate_count_spinbox.grid(row=0, column=6)
+
+        # Search engine used for the shortest path
+        self.search_method_label = ttk.Label(self.control_frame, text="Search:")
+        self.search_method_label.grid(row=0, column=7)
+
+        self.search_method = tk.StringVar(value='dijkstra')
+        self.search_method_combobox = ttk.Combobox(self.control_frame, textvariable=self.search_method,
+                                                   values=self.engine.search_methods, state='readonly', width=12)
+        self.search_method_combobox.grid(row=0, column=8, padx=5)
+
+        # Keep the shortest-path tree of the last query up to date as edges are edited
+        self.incremental = tk.BooleanVar(value=self.engine.incremental)
+        self.incremental_check = ttk.Checkbutton(self.control_frame, text="Incremental", variable=self.incremental,
+                                                 command=self.toggle_incremental)
+        self.incremental_check.grid(row=0, column=9, padx=5)
+
+        # Source and target of the displayed shortest path, refreshed after edits in incremental mode
+        self.current_query = None
+
+        # Redraw scheduled with after(), so a burst of edits is drawn once
+        self.redraw_pending = None
+
+        # Step-by-step animation of Dijkstra's algorithm, replayed from a recorded trace
+        self.animation_frame = ttk.Frame(master)
+        self.animation_frame.pack(pady=5)
+
+        self.animate_button = ttk.Button(self.animation_frame, text="Animate", command=self.animate)
+        self.animate_button.grid(row=0, column=0, padx=5)
+
+        self.play_button = ttk.Button(self.animation_frame, text="Play", command=self.toggle_play, state=tk.DISABLED)
+        self.play_button.grid(row=0, column=1, padx=5)
+
+        self.animation_position = tk.DoubleVar(value=0)
+        self.animation_scale = ttk.Scale(self.animation_frame, from_=0, to=0, length=300,
+                                         variable=self.animation_position, command=self.seek_animation)
+        self.animation_scale.grid(row=0, column=2, padx=5)
+
+        self.animation_speed_label = ttk.Label(self.animation_frame, text="Steps/s:")
+        self.animation_speed_label.grid(row=0, column=3)
+
+        self.animation_speed = tk.IntVar(value=50)
+        self.animation_speed_spinbox = ttk.Spinbox(self.animation_frame, from_=1, to=100000, increment=10, width=7,
+                                                   textvariable=self.animation_speed, command=self.set_animation_speed)
+        self.animation_speed_spinbox.grid(row=0, column=4)
+
+        self.animation_status_label = ttk.Label(self.animation_frame, text="")
+        self.animation_status_label.grid(row=0, column=5, padx=5)
+
+        self.animation = None
+
         # Import Button
         self.import_frame = ttk.Frame(master)
         self.import_frame.pack(pady=10)
@@ -67,6 +144,29 @@ class GraphLearningPlatform:
         self.import_graph_button = ttk.Button(self.import_frame, text="Import Graph", command=self.import_graph)
         self.import_graph_button.grid(row=0, column=0, padx=5)
 
+        self.cancel_import_button = ttk.Button(self.import_frame, text="Cancel Import", command=self.cancel_import,
+                                               state=tk.DISABLED)
+        self.cancel_import_button.grid(row=0, column=1, padx=5)
+
+        self.save_snapshot_button = ttk.Button(self.import_frame, text="Save Snapshot", command=self.save_snapshot)
+        self.save_snapshot_button.grid(row=0, column=2, padx=5)
+
+        self.load_snapshot_button = ttk.Button(self.import_frame, text="Load Snapshot", command=self.load_snapshot)
+        self.load_snapshot_button.grid(row=0, column=3, padx=5)
+
+        # Preprocess the graph for the 'ch' search; it is saved with the next snapshot
+        self.build_hierarchy_button = ttk.Button(self.import_frame, text="Build Hierarchy",
+                                                 command=self.build_hierarchy)
+        self.build_hierarchy_button.grid(row=0, column=4, padx=5)
+        self.enable_hierarchy_button()
+
+        self.import_status_label = ttk.Label(self.import_frame, text="")
+        self.import_status_label.grid(row=0, column=5, padx=5)
+
+        # Import running on a worker thread, if any
+        self.background_import = None
+        self.import_report = None
+
         # Result Frame
         self.result_frame = ttk.Frame(master)
         self.result_frame.pack(pady=10)
@@ -90,18 +190,65 @@ class GraphLearningPlatform:
         self.figure, self.ax = plt.subplots(figsize=(9, 7))  # Larger figure size for better visualization
         self.canvas = FigureCanvasTkAgg(self.figure, master=self.master)
         self.canvas.get_tk_widget().pack(pady=10)
+        # Pan and zoom; the wheel zooms too
+        self.toolbar = NavigationToolbar2Tk(self.canvas, self.master, pack_toolbar=False)
+        self.toolbar.update()
+        self.toolbar.pack()
+        self.renderer = GraphRenderer(self.ax, self.canvas)
+
+        # Timings of the last query, layout and draw, shown while profiling is enabled
+        self.profile_label = ttk.Label(master, text="", anchor=tk.W)
+        if profiler.enabled:
+            self.profile_label.pack(side=tk.BOTTOM, fill=tk.X, padx=5, before=self.title_label)  # Keeps its space
 
         self.master.protocol("WM_DELETE_WINDOW", self.on_closing)
 
+    @property
+    def graph(self):
+        """The graph held by the engine."""
+        return self.engine.graph
+
+    @property
+    def pos(self):
+        """The node positions held by the engine."""
+        return self.engine.pos
+
     def add_node(self):
         """Add a node to the graph."""
         node = self.node_entry.get()
-        if node:
-            self.graph.add_node(node)
+        if self.engine.add_node(node):
+            self.cancel_query()  # Its result would be for the old graph
             self.node_entry.delete(0, tk.END)
-            # Update node positions only when adding nodes
-            self.pos = nx.spring_layout(self.graph, k=1.2, iterations=50)
-            self.visualize_graph()
+            # Place only the new node; existing nodes keep their positions
+            self.engine.place_new_nodes()
+            self.request_redraw()
+
+    def relayout(self):
+        """Run a full spring layout in the background and redraw when it finishes."""
+        if self.background_relayout is None:
+            self.background_relayout = BackgroundRelayout(self.graph, self.pos)
+            self.relayout_button.config(state=tk.DISABLED)
+            self.background_relayout.start()
+            self.master.after(50, self.poll_relayout)
+
+    def poll_relayout(self):
+        """Apply the background layout once it is done."""
+        job = self.background_relayout
+        if not job.done():
+            self.master.after(50, self.poll_relayout)
+            return
+        self.background_relayout = None
+        self.relayout_button.config(state=tk.NORMAL)
+        if job.error is not None:
+            self.import_status_label.config(text=f"Relayout failed: {job.error}")  # The old positions stay
+            return
+        self.engine.pos = job.result
+        self.engine.place_new_nodes()  # Nodes added while the layout was running
+        self.request_redraw()
+
+    def edge_prompt(self):
+        """Text for the edge entry label, naming the direction when edges are one-way."""
+        return "Edge (from,to,weight):" if self.engine.directed else "Edge (node1,node2,weight):"
 
     def add_edge(self):
         """Add an edge to the graph with a weight."""
@@ -109,120 +256,245 @@ class GraphLearningPlatform:
         if len(edge_input) == 3:
             node1, node2, weight = edge_input
             try:
-                weight = float(weight)
-                if node1 in self.graph and node2 in self.graph:
-                    self.graph.add_edge(node1, node2, weight=weight)
+                if self.engine.add_edge(node1, node2, weight):
+                    self.cancel_query()  # Its result would be for the old graph
                     self.edge_entry.delete(0, tk.END)
-                    self.visualize_graph()  # Update the graph visualization with same node positions
+                    if self.engine.incremental and self.current_query and self.search_method.get() == 'dijkstra':
+                        self.refresh_path()
+                    else:
+                        self.request_redraw()  # Update the graph visualization with same node positions
             except ValueError:
                 print("Invalid weight entered")
 
+    def toggle_incremental(self):
+        """Switch the engine's incremental shortest-path maintenance on or off."""
+        self.engine.incremental = self.incremental.get()
+
+    def refresh_path(self):
+        """Show the updated shortest path of the current query straight after an edit.
+
+        The alternate paths are cleared, since they were found on the old graph.
+        """
+        self.start_query(self.show_result, self.solve_refresh, *self.current_query)
+
+    def solve_refresh(self, source, target, cancel_event=None):
+        """Read the current query's path from the incrementally updated tree. Runs on a worker thread."""
+        path_length, path = self.engine.shortest_path(source, target, cancel_event=cancel_event)
+        return path_length, path, f"{self.engine.last_changed} nodes updated", []
+
     def import_graph(self):
-        """Import graph data from a CSV file."""
+        """Import graph data from a CSV file, parsing it on a worker thread."""
         file_path = filedialog.askopenfilename(filetypes=[("CSV files", "*.csv")])
+        if file_path and self.background_import is None:
+            self.cancel_query()  # Its result would be for the old graph
+            self.background_import = BackgroundImport(file_path)
+            self.import_report = ImportReport()
+            self.import_graph_button.config(state=tk.DISABLED)
+            self.cancel_import_button.config(state=tk.NORMAL)
+            self.import_status_label.config(text="Importing... 0%")
+            self.background_import.start()
+            self.master.after(50, self.poll_import)
+
+    def poll_import(self):
+        """Apply one parsed batch per callback so the window keeps handling events between batches."""
+        job = self.background_import
+        try:
+            batch = job.queue.get_nowait()
+        except queue.Empty:
+            self.master.after(50, self.poll_import)
+            return
+        if batch is not None and not isinstance(batch, Exception):
+            self.cancel_query()  # A query started during the import would see a partial graph
+            self.engine.apply_csv_batch(batch, self.import_report)
+            self.import_status_label.config(text=f"Importing... {batch.progress:.0%}")
+            if not job.cancelled:
+                self.master.after(1, self.poll_import)
+                return
+
+        self.background_import = None
+        self.import_graph_button.config(state=tk.NORMAL)
+        self.cancel_import_button.config(state=tk.DISABLED)
+        if isinstance(batch, Exception):
+            self.import_status_label.config(text=f"Import failed: {batch}")
+            return
+        self.import_report.cancelled = job.cancelled
+        self.import_status_label.config(text=self.import_report.summary())
+
+        # Draw straight away with a quick placement, then refine the layout in the background.
+        # Larger graphs keep the quick placement; Relayout still runs the full layout on request.
+        self.engine.place_new_nodes()
+        self.visualize_graph()
+        if self.graph.number_of_nodes() <= RELAYOUT_MAX_NODES:
+            self.relayout()
+
+    def cancel_import(self):
+        """Stop the running import. Batches already applied stay in the graph."""
+        if self.background_import is not None:
+            self.background_import.cancel()
+
+    def save_snapshot(self):
+        """Save the graph and its layout to a binary snapshot file."""
+        file_path = filedialog.asksaveasfilename(defaultextension=".graph",
+                                                 filetypes=[("Graph snapshots", "*.graph")])
         if file_path:
-            with open(file_path, mode='r') as file:
-                reader = csv.reader(file)
-                next(reader)  # Skip header
-                for row in reader:
-                    if row[0] == "Node":
-                        self.add_node_from_import(row[1])
-                    elif row[0] == "Edge":
-                        self.add_edge_from_import(row[1], row[2], row[3])
-
-            # Update visualization
-            self.pos = nx.spring_layout(self.graph, k=1.2, iterations=50)
-            self.visualize_graph()
-
-    def add_node_from_import(self, node):
-        """Add a node to the graph from imported data."""
-        if node:
-            self.graph.add_node(node)
+            self.engine.save_snapshot(file_path)
+            self.import_status_label.config(text=f"Saved {self.engine.compact_graph().number_of_nodes()} nodes.")
 
-    def add_edge_from_import(self, node1, node2, weight):
-        """Add an edge to the graph from imported data."""
-        if node1 in self.graph and node2 in self.graph:
+    def load_snapshot(self):
+        """Load a graph snapshot saved with Save Snapshot."""
+        file_path = filedialog.askopenfilename(filetypes=[("Graph snapshots", "*.graph")])
+        if file_path:
+            self.cancel_query()  # Its result would be for the old graph
+            self.stop_animation()  # Node and edge positions are renumbered
             try:
-                weight = float(weight)
-                self.graph.add_edge(node1, node2, weight=weight)
-            except ValueError:
-                print("Invalid weight entered")
+                self.engine.load_snapshot(file_path)
+            except (OSError, ValueError) as exc:
+                self.import_status_label.config(text=f"Load failed: {exc}")
+                return
+            self.import_status_label.config(text=f"Loaded {self.engine.compact_graph().number_of_nodes()} nodes.")
+            self.update_mode_controls()  # The snapshot decides whether edges are one-way
+            self.engine.place_new_nodes()  # In case the snapshot was saved before every node was placed
+            self.visualize_graph()
 
-    def visualize_graph(self, path_nodes=None, path_edges=None):
-        """Visualize the current graph."""
-        self.ax.clear()  # Clear previous plot
-        if self.graph.number_of_nodes() == 0:
-            self.ax.set_title("Graph Visualization")
-            self.canvas.draw()
+    def build_hierarchy(self):
+        """Build the contraction hierarchy used by the 'ch' search on a worker thread.
+
+        It replaces any running query, which could be using the old hierarchy.
+        """
+        self.start_query(self.show_hierarchy, self.solve_hierarchy)
+        self.build_hierarchy_button.config(state=tk.DISABLED)
+        self.path_length_label.config(text="Building hierarchy...")
+
+    def enable_hierarchy_button(self):
+        """Enable Build Hierarchy, unless the graph is directed: contraction hierarchies need an undirected one."""
+        self.build_hierarchy_button.config(state=tk.DISABLED if self.engine.directed else tk.NORMAL)
+
+    def update_mode_controls(self):
+        """Match the edge prompt, the search methods and Build Hierarchy to whether the graph is directed."""
+        self.edge_label.config(text=self.edge_prompt())
+        self.search_method_combobox.config(values=self.engine.search_methods)
+        if self.search_method.get() not in self.engine.search_methods:
+            self.search_method.set('dijkstra')
+        self.enable_hierarchy_button()
+
+    def solve_hierarchy(self, cancel_event=None):
+        """Build the contraction hierarchy and return its number of shortcuts. Runs on a worker thread."""
+        return self.engine.build_hierarchy(cancel_event).number_of_shortcuts()
+
+    def show_hierarchy(self, result):
+        """Report the hierarchy built by build_hierarchy, or the error it raised."""
+        self.enable_hierarchy_button()
+        self.path_length_label.config(text="")
+        if isinstance(result, Exception):
+            self.import_status_label.config(text=f"Hierarchy failed: {result}")
             return
+        self.import_status_label.config(text=f"Hierarchy built with {result} shortcuts.")
+        self.search_method.set('ch')
 
-        # Set default node and edge colors
-        node_colors = ['lightblue' for node in self.graph.nodes()]
-        edge_colors = ['black' for edge in self.graph.edges()]
+    def request_redraw(self):
+        """Redraw the graph shortly, once for a whole burst of edits."""
+        if self.redraw_pending is None:
+            self.redraw_pending = self.master.after(30, self.visualize_graph)
 
-        # Highlight the shortest path nodes and edges if provided
+    def visualize_graph(self, path_nodes=None, path_edges=None):
+        """Visualize the current graph, highlighting the given path."""
+        if self.redraw_pending is not None:
+            self.master.after_cancel(self.redraw_pending)  # This draw covers it
+            self.redraw_pending = None
+        highlights = []
         if path_nodes is not None:
-            for node in path_nodes:
-                node_colors[list(self.graph.nodes()).index(node)] = 'orange'
-            if path_edges is not None:
-                for edge in path_edges:
-                    edge_colors[list(self.graph.edges()).index(edge)] = 'orange'
-
-        # Draw the graph with the updated node and edge colors
-        nx.draw(self.graph, self.pos, with_labels=True, node_color=node_colors, edge_color=edge_colors,
-                node_size=700, font_size=12, font_color='black', font_weight='bold')
-
-        # Draw edge labels (weights)
-        edge_labels = nx.get_edge_attributes(self.graph, 'weight')
-        nx.draw_networkx_edge_labels(self.graph, self.pos, edge_labels=edge_labels, font_color='red', font_size=10)
-
-        self.ax.set_title("Graph Visualization")
-        self.canvas.draw()  # Update the canvas
+            highlights.append((path_nodes, path_edges, HIGHLIGHT_COLOR))
+        self.renderer.draw(self.engine, highlights)
+        if profiler.enabled:
+            self.profile_label.config(text=profiler.summary())
 
     def run_algorithm(self):
-        """Run Dijkstra's algorithm and display the shortest path and alternate paths."""
+        """Run Dijkstra's algorithm on a worker thread and display the shortest path and alternate paths."""
         source = self.source_entry.get()
         target = self.target_entry.get()
 
         if source not in self.graph or target not in self.graph:
             self.path_length_label.config(text="Source or target node not found in graph.")
             return
+        self.current_query = (source, target)
+        self.stop_animation()
+        if self.search_method.get() == 'astar':
+            self.engine.place_new_nodes()  # A* reads the positions on the worker thread, which must not place nodes
 
         try:
-            # Get the shortest path
-            path_length, path = nx.single_source_dijkstra(self.graph, source, target=target)
-            self.path_length_label.config(text=f"Shortest Path Length: {path_length}")
-
-            # Create a hyperlink for the shortest path
-            if self.shortest_path_link is not None:
-                self.shortest_path_link.destroy()  # Remove the previous link if it exists
-
-            self.shortest_path_link = ttk.Label(self.result_frame, text=f"Final Path: {' -> '.join(path)}",
-                                                 foreground="blue", cursor="hand2", font=("Helvetica", 10, "underline"))
-            self.shortest_path_link.pack()
-            self.shortest_path_link.bind("<Button-1>", lambda e: self.highlight_shortest_path(path))
-
-            # Find alternate paths and store them
-            self.alternate_paths = []
-            all_paths = list(nx.all_simple_paths(self.graph, source, target))
-            for p in all_paths:
-                if p != path:  # Ensure the path is not the shortest path
-                    length = sum(self.graph[u][v]['weight'] for u, v in zip(p[:-1], p[1:]))
-                    self.alternate_paths.append((p, length))
+            k = max(0, self.alternate_count.get())
+        except tk.TclError:
+            k = 0
+        self.start_query(self.show_result, self.solve_query, source, target, self.search_method.get(), k)
+
+    def solve_query(self, source, target, method, k, cancel_event=None):
+        """Find the shortest path and up to k alternate paths. Runs on a worker thread."""
+        path_length, path = self.engine.shortest_path(source, target, method, cancel_event=cancel_event)
+        settled = self.engine.last_settled
+        # Find the next shortest paths lazily and keep the first k that differ from the shortest path
+        alternate_paths = self.engine.alternate_paths(source, target, k, shortest_path=path,
+                                                      cancel_event=cancel_event) if k else []
+        return path_length, path, f"{settled} nodes settled", alternate_paths
+
+    def start_query(self, on_result, func, *args):
+        """Run func(*args) on a worker thread and pass its result to on_result, superseding any running query."""
+        self.cancel_query()
+        self.background_query = BackgroundQuery(func, *args)
+        self.cancel_query_button.config(state=tk.NORMAL)
+        self.path_length_label.config(text="Running...")
+        self.background_query.start()
+        self.master.after(50, self.poll_query, self.background_query, on_result)
+
+    def poll_query(self, job, on_result):
+        """Hand the result of a finished query to on_result, unless it was cancelled or superseded."""
+        if job is not self.background_query:
+            return
+        try:
+            result = job.queue.get_nowait()
+        except queue.Empty:
+            self.master.after(50, self.poll_query, job, on_result)
+            return
+        self.background_query = None
+        self.cancel_query_button.config(state=tk.DISABLED)
+        on_result(result)
+
+    def cancel_query(self):
+        """Stop the running query, if any, and discard its result."""
+        if self.background_query is not None:
+            self.background_query.cancel()
+            self.background_query = None
+            self.cancel_query_button.config(state=tk.DISABLED)
+            self.enable_hierarchy_button()  # In case the query was a hierarchy build
+            self.path_length_label.config(text="Query cancelled.")
+
+    def show_result(self, result):
+        """Display the (length, path, note, alternate paths) found by a query, or the error it raised."""
+        if isinstance(result, nx.NetworkXNoPath):
+            self.path_length_label.config(text="No path exists between the selected nodes.")
+            self.final_path_label.config(text="")
+            self.alternate_paths.clear()
+            self.display_alternate_paths()
+            self.visualize_graph()
+            return
+        if isinstance(result, Exception):
+            self.path_length_label.config(text=f"Query failed: {result}")
+            return
+        path_length, path, note, self.alternate_paths = result
+        self.path_length_label.config(text=f"Shortest Path Length: {path_length} ({note})")
 
-            # Sort alternate paths by length and keep only the top 3
-            self.alternate_paths.sort(key=lambda x: x[1])  # Sort by length
-            self.alternate_paths = self.alternate_paths[:3]  # Keep only the top 3
+        # Create a hyperlink for the shortest path
+        if self.shortest_path_link is not None:
+            self.shortest_path_link.destroy()  # Remove the previous link if it exists
 
-            self.display_alternate_paths()  # Show alternate paths
+        self.shortest_path_link = ttk.Label(self.result_frame, text=f"Final Path: {' -> '.join(path)}",
+                                            foreground="blue", cursor="hand2", font=("Helvetica", 10, "underline"))
+        self.shortest_path_link.pack()
+        self.shortest_path_link.bind("<Button-1>", lambda e: self.highlight_shortest_path(path))
 
-            # Highlight the shortest path in the graph
-            self.highlight_shortest_path(path)
+        self.display_alternate_paths()  # Show alternate paths
 
-        except nx.NetworkXNoPath:
-            self.path_length_label.config(text="No path exists between the selected nodes.")
-            self.final_path_label.config(text="")
-            self.alternate_paths.clear()
+        # Highlight the shortest path in the graph
+        self.highlight_shortest_path(path)
 
     def display_alternate_paths(self):
         """Display the alternate paths with clickable links."""
@@ -242,6 +514,73 @@ class GraphLearningPlatform:
             alt_path_link.pack()
             alt_path_link.bind("<Button-1>", lambda e, path=alt_path: self.highlight_alternate_path(path))
 
+    def animate(self):
+        """Record Dijkstra's algorithm on a worker thread, then play it back step by step."""
+        source = self.source_entry.get()
+        target = self.target_entry.get()
+
+        if source not in self.graph or target not in self.graph:
+            self.path_length_label.config(text="Source or target node not found in graph.")
+            return
+        self.stop_animation()
+        self.start_query(self.start_animation, self.engine.trace_dijkstra, source, target)
+
+    def start_animation(self, trace):
+        """Play a recorded SearchTrace from the start."""
+        if isinstance(trace, Exception):
+            self.path_length_label.config(text=f"Query failed: {trace}")
+            return
+        if trace.path is None:
+            self.path_length_label.config(text="No path exists between the selected nodes.")
+        else:
+            self.path_length_label.config(text=f"Shortest Path Length: {trace.length} "
+                                          f"({self.engine.last_settled} nodes settled)")
+        self.visualize_graph()  # Bring the renderer up to date with the recorded node and edge positions
+        self.animation = TraceAnimation(self.master, self.renderer, trace, on_frame=self.show_animation_frame)
+        self.set_animation_speed()
+        self.animation_scale.config(to=len(trace))
+        self.play_button.config(state=tk.NORMAL, text="Pause")
+        self.animation.play()
+
+    def show_animation_frame(self, position):
+        """Move the slider and the step counter along with the animation."""
+        self.animation_position.set(position)
+        self.animation_status_label.config(text=f"Step {position} / {len(self.animation)}")
+        if not self.animation.playing:
+            self.play_button.config(text="Play")
+
+    def toggle_play(self):
+        """Pause the animation, or resume it."""
+        if self.animation.playing:
+            self.animation.pause()
+            self.play_button.config(text="Play")
+        else:
+            self.animation.play()
+            self.play_button.config(text="Pause")
+
+    def seek_animation(self, value):
+        """Pause the animation and show the step picked on the slider."""
+        if self.animation is not None and int(float(value)) != self.animation.position:
+            self.animation.pause()
+            self.play_button.config(text="Play")
+            self.animation.seek(float(value))
+
+    def set_animation_speed(self):
+        """Apply the steps per second from the speed box."""
+        if self.animation is not None:
+            try:
+                self.animation.speed = max(1, self.animation_speed.get())
+            except tk.TclError:
+                pass  # Not a number; keep the current speed
+
+    def stop_animation(self):
+        """Stop the animation and forget its trace."""
+        if self.animation is not None:
+            self.animation.pause()
+            self.animation = None
+            self.play_button.config(state=tk.DISABLED, text="Play")
+            self.animation_status_label.config(text="")
+
     def highlight_shortest_path(self, path):
         """Highlight the shortest path on the graph."""
         path_edges = list(zip(path[:-1], path[1:]))
@@ -254,9 +593,34 @@ class GraphLearningPlatform:
 
     def on_closing(self):
         """Handle the window closing event."""
+        self.cancel_query()
         self.master.destroy()
 
 if __name__ == "__main__":
-    root = tk.Tk()
-    app = GraphLearningPlatform(root)
-    root.mainloop()
+    parser = argparse.ArgumentParser(
+        description="Dijkstra Algorithm Visualizer. Opens the GUI unless --batch is given.")
+    parser.add_argument("--batch", metavar="PAIRS_CSV",
+                        help="answer every source,target pair in this CSV without opening the GUI")
+    parser.add_argument("--graph", help="graph to query in batch mode: a .graph snapshot or an importable CSV")
+    parser.add_argument("--output", help="where to write the batch results (default: stdout)")
+    parser.add_argument("--workers", type=int, help="worker processes for batch mode (default: one per core)")
+    parser.add_argument("--no-paths", action="store_true", help="write only lengths, as a distance table")
+    parser.add_argument("--profile", action="store_true", help="show query, layout and drawing timings in a status bar")
+    parser.add_argument("--trace", metavar="FILE",
+                        help="append timing spans to FILE as JSON lines (or set the DIJKSTRA_TRACE variable)")
+    parser.add_argument("--directed", action="store_true", help="make edges one-way links from their first node")
+    parser.add_argument("--multigraph", action="store_true",
+                        help="keep parallel edges between two nodes; searches use the lightest")
+    args = parser.parse_args()
+    if args.profile or args.trace:
+        profiler.enable(args.trace or profiler.trace_path)
+
+    if args.batch:
+        if not args.graph:
+            parser.error("--batch needs --graph")
+        batch.main(args.graph, args.batch, args.output, args.workers, with_paths=not args.no_paths,
+                   directed=args.directed)
+    else:
+        root = tk.Tk()
+        app = GraphLearningPlatform(root, directed=args.directed, multigraph=args.multigraph)
+        root.mainloop()
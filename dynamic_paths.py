@@ -0,0 +1,132 @@
+"""Shortest-path tree kept up to date as edges are added or reweighted.
+
+After edge u-v is added or its weight changes, only the nodes whose
+distance from the source depends on that edge are visited. The approach
+follows Ramalingam and Reps (1996):
+
+* A new edge or a lower weight can only shorten paths that run through it.
+  A Dijkstra search is seeded at v with the new distance. It spreads
+  outwards and stops at every node it does not improve.
+* A higher weight on the tree edge into v can only lengthen paths in v's
+  subtree. Its nodes are visited parents first. A node keeps its distance if
+  a neighbour with a correct distance still reaches it at that distance.
+  Otherwise it is affected. A Dijkstra search then settles the affected
+  nodes again, seeded from their unaffected neighbours.
+* A higher weight on an edge outside the tree changes nothing.
+
+Like the kernels in search.py, the tree walks the graph through
+neighbors(node) functions, so it works on any adjacency.
+"""
+from heapq import heappop, heappush
+from itertools import count
+from math import inf
+
+from search import cancellable, dijkstra, unwind
+
+
+class DynamicShortestPathTree:
+    """A shortest-path tree from one source that is updated after each edge change.
+
+    dist and pred mean the same as in search.dijkstra, except that after an
+    update dist is no longer in settle order. reverse_neighbors walks edges
+    backwards. It defaults to neighbors, which is right for undirected
+    graphs. Setting cancel_event stops the initial search with Cancelled.
+    """
+
+    def __init__(self, neighbors, source, reverse_neighbors=None, cancel_event=None):
+        self.neighbors = neighbors
+        self.reverse_neighbors = reverse_neighbors or neighbors
+        self.source = source
+        self.dist, self.pred = dijkstra(cancellable(neighbors, cancel_event), source)
+        self.children = {}  # Node -> {child: None}, the tree edges leading away from the source
+        for node, parent in self.pred.items():
+            self.children.setdefault(parent, {})[node] = None
+        self.last_changed = len(self.dist)  # Nodes whose distance changed in the last update
+
+    def path(self, target):
+        """Return (length, path) to target, or (inf, None) if it is unreachable."""
+        if target not in self.dist:
+            return inf, None
+        return self.dist[target], unwind(self.pred, target)
+
+    def update_edge(self, u, v, old_weight, new_weight, directed=False):
+        """Update the tree after edge u-v changed from old_weight to new_weight.
+
+        old_weight is None for a new edge. The neighbors functions must
+        already return the new weight.
+        """
+        self.last_changed = 0
+        for a, b in ((u, v),) if directed else ((u, v), (v, u)):
+            if old_weight is None or new_weight < old_weight:
+                self._decrease(a, b, new_weight)
+            elif new_weight > old_weight and b in self.pred and self.pred[b] == a:
+                self._increase(b)
+
+    def _set_parent(self, node, parent):
+        if node in self.pred:
+            self.children[self.pred[node]].pop(node, None)
+        if parent is None:
+            self.pred.pop(node, None)
+        else:
+            self.pred[node] = parent
+            self.children.setdefault(parent, {})[node] = None
+
+    def _decrease(self, a, b, weight):
+        """Propagate a shorter distance to b over the edge a -> b."""
+        if a not in self.dist or self.dist[a] + weight >= self.dist.get(b, inf):
+            return
+        c = count()
+        heap = [(self.dist[a] + weight, next(c), b, a)]
+        while heap:
+            d, _, node, parent = heappop(heap)
+            if d >= self.dist.get(node, inf):
+                continue
+            self.dist[node] = d
+            self._set_parent(node, parent)
+            self.last_changed += 1
+            for u, w in self.neighbors(node):
+                if d + w < self.dist.get(u, inf):
+                    heappush(heap, (d + w, next(c), u, node))
+
+    def _increase(self, root):
+        """Repair the subtree under root after the tree edge into root became heavier."""
+        subtree = [root]
+        for node in subtree:  # Breadth-first, so parents come before their children
+            subtree.extend(self.children.get(node, ()))
+        pending = set(subtree)  # Not yet known to keep their distance
+        affected = set()
+        for node in subtree:
+            pending.discard(node)
+            if node != root and self.pred[node] not in affected:
+                continue  # Its tree path is unchanged
+            d = self.dist[node]
+            parent = next((u for u, w in self.reverse_neighbors(node)  # A 0-weight self-loop must not count
+                           if u != node and u not in pending and u not in affected and u in self.dist
+                           and self.dist[u] + w == d), None)
+            if parent is None:
+                affected.add(node)
+            elif parent != self.pred.get(node):
+                self._set_parent(node, parent)
+
+        for node in affected:
+            del self.dist[node]
+            self._set_parent(node, None)
+        c = count()
+        heap = []
+        for node in affected:
+            best, parent = inf, None
+            for u, w in self.reverse_neighbors(node):
+                if u in self.dist and self.dist[u] + w < best:
+                    best, parent = self.dist[u] + w, u
+            if parent is not None:
+                heappush(heap, (best, next(c), node, parent))
+        while heap:
+            d, _, node, parent = heappop(heap)
+            if node in self.dist:
+                continue
+            self.dist[node] = d
+            self._set_parent(node, parent)
+            for u, w in self.neighbors(node):
+                if u in affected and u not in self.dist:
+                    heappush(heap, (d + w, next(c), u, node))
+        self.last_changed += len(affected)
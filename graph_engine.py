@@ -0,0 +1,733 @@
+"""Headless shortest-path engine for the Dijkstra Algorithm Visualizer.
+
+The GUIs in dijkstra_test.py and dijkstra_alternate.py call into this module.
+It does not import tkinter or matplotlib, so batch jobs can use it without a
+display.
+"""
+import os
+import queue
+import threading
+from itertools import islice
+
+import networkx as nx
+
+import layout
+import search
+from dynamic_paths import DynamicShortestPathTree
+from graph_io import (ImportReport, hierarchy_path, load_hierarchy, load_snapshot, read_csv_batches, save_hierarchy,
+                      save_snapshot)
+from path_cache import ShortestPathTreeCache
+from profiling import profiler
+from replacement_paths import replacement_paths
+from search import RELAX, SETTLE, Cancelled, SearchCounters, SearchTrace, cancellable, counted, unwind
+
+
+def k_shortest_paths(graph, source, target, k, weight='weight', cancel_event=None):
+    """Yield up to k loopless paths from source to target in order of increasing length.
+
+    Paths are produced lazily by Yen's algorithm, so only as many searches are
+    run as paths are consumed. Raises Cancelled once cancel_event is set.
+    """
+    search_weight = weight if cancel_event is None else _cancellable_weight(weight, cancel_event)
+    for path in islice(nx.shortest_simple_paths(graph, source, target, weight=search_weight), k):
+        yield path, nx.path_weight(graph, path, weight)
+
+
+def _cancellable_weight(weight, cancel_event, banned=()):
+    """Return a networkx weight function that raises Cancelled once cancel_event is set.
+
+    Edges whose (u, v) pair is in banned are hidden.
+    """
+    def checked(u, v, d):
+        if cancel_event is not None and cancel_event.is_set():
+            raise Cancelled()
+        return None if (u, v) in banned else d.get(weight, 1)
+    return checked
+
+
+class GraphEngine:
+    """Graph structure and shortest-path queries, independent of any user interface.
+
+    With compact=True, queries run on a CSRGraph snapshot of the graph. It is
+    rebuilt whenever the graph has changed. This needs NumPy.
+
+    Shortest-path trees are cached per source, up to cache_nodes nodes in
+    total. Repeat queries from a source are then answered by walking the
+    tree. Pass cache_nodes=0 to disable the cache.
+
+    shortest_path can also run one of the goal-directed searches in
+    SEARCH_METHODS. After every query, last_settled holds the number of nodes
+    the search settled. method='ch' queries a contraction hierarchy, built by
+    build_hierarchy. Any change to the graph makes it stale, and the next
+    'ch' query rebuilds it.
+
+    With incremental=True, plain Dijkstra queries are answered from one
+    shortest-path tree rooted at the last source. add_edge updates it in
+    place, touching only the nodes whose distance the edit changes, and
+    last_changed counts them. Other edits rebuild the tree on the next query.
+
+    The query methods take a cancel_event, so they can run on a worker thread
+    (see BackgroundQuery). They raise search.Cancelled soon after it is set.
+    Derived data is tagged with the version read before it was computed, so
+    a query overtaken by an edit never caches stale results.
+
+    Queries, alternate paths, layout, imports and preprocessing are timed as
+    profiling spans. While profiling is enabled, last_counters holds the
+    search.SearchCounters of the last shortest-path query, and the query span
+    carries them too.
+
+    With directed=True, edges are one-way links from their first node to
+    their second. Contraction hierarchies need an undirected graph, so 'ch'
+    queries raise ValueError then.
+
+    With multigraph=True, adding an edge between two linked nodes adds a
+    parallel edge instead of replacing the weight. Searches only ever take
+    the lightest of parallel edges, so the search graph holds just that one.
+    It is kept up to date as edges are added, and queries cost the same as on
+    a simple graph. parallel records the weights of node pairs with more than
+    one edge.
+    """
+
+    SEARCH_METHODS = ('dijkstra', 'bidirectional', 'astar', 'alt', 'ch')
+    LANDMARKS = 8  # Landmarks precomputed for the ALT search
+
+    @property
+    def search_methods(self):
+        """The SEARCH_METHODS that work on this graph: all but 'ch' if it is directed."""
+        return tuple(method for method in self.SEARCH_METHODS if not (self.directed and method == 'ch'))
+
+    def __init__(self, compact=False, cache_nodes=1_000_000, incremental=False, directed=False, multigraph=False):
+        self.version = 0  # Incremented on every change to the graph
+        self.directed = directed
+        self.multigraph = multigraph
+        self.graph = nx.DiGraph() if directed else nx.Graph()
+        self.parallel = {}  # Node pair (see _pair) -> weights of its parallel edges, if it has several
+        self.pos = {}  # Node positions, filled in by the layout
+        self.compact = compact
+        self.cache = ShortestPathTreeCache(cache_nodes) if cache_nodes else None
+        self._csr = None
+        self._csr_version = -1
+        self.last_settled = 0  # Nodes settled by the last shortest-path search
+        self._euclidean = None  # (version, pos, coords, scale) for the A* heuristic
+        self._landmarks = None  # (version, compact, distance maps) for the ALT heuristic
+        self._hierarchy = None  # (version, ContractionHierarchy)
+        self.incremental = incremental
+        self.last_changed = 0  # Nodes whose distance changed in the last incremental update
+        self._dynamic = None  # (version, DynamicShortestPathTree) for incremental queries
+        self._reverse_csr = None  # (version, CSRGraph) with the edges of a directed graph turned around
+        self.last_counters = None  # SearchCounters of the last query, while profiling is enabled
+
+    @property
+    def graph(self):
+        """The networkx graph. After loading a snapshot it is only built when first needed."""
+        if self._graph is None:
+            self._graph = self._csr.to_networkx(nx.DiGraph() if self.directed else nx.Graph())
+        return self._graph
+
+    @graph.setter
+    def graph(self, graph):
+        self._graph = graph
+        self._node_index = None  # Rebuilt from the new graph when next needed
+        self.parallel = {}
+        self.version += 1
+
+    @property
+    def node_index(self):
+        """Node -> position in insertion order. Kept in sync as nodes are added."""
+        if self._node_index is None:
+            self._index_graph()
+        return self._node_index
+
+    @property
+    def edge_list(self):
+        """Edges in insertion order, each in its canonical orientation (see edge_key).
+
+        In a directed graph u -> v and v -> u are two entries.
+        """
+        if self._node_index is None:
+            self._index_graph()
+        return self._edge_list
+
+    @property
+    def edge_index(self):
+        """Canonical edge -> position in edge_list. Kept in sync as edges are added."""
+        if self._node_index is None:
+            self._index_graph()
+        return self._edge_index
+
+    @property
+    def reweighted_edges(self):
+        """Canonical edges added again after they were in edge_list, in order, so their weight may have changed.
+
+        Entries are only ever appended, so a renderer can read the ones added
+        since its last draw. A new list is started when the position maps are
+        rebuilt.
+        """
+        if self._node_index is None:
+            self._index_graph()
+        return self._reweighted_edges
+
+    def edge_key(self, u, v):
+        """Return the canonical orientation of edge (u, v): the endpoint added first comes first.
+
+        Edges of a directed graph keep their direction.
+        """
+        if self.directed:
+            return u, v
+        index = self.node_index
+        return (u, v) if index[u] <= index[v] else (v, u)
+
+    def _pair(self, u, v):
+        """Key of the parallel edges between u and v. Unlike edge_key, it does not need node_index."""
+        return (u, v) if self.directed else frozenset((u, v))
+
+    def edge_weights(self, u, v):
+        """Return the weights of every edge from u to v. Searches use the smallest."""
+        weights = self.parallel.get(self._pair(u, v))
+        if weights is not None:
+            return list(weights)
+        return [self.graph[u][v].get('weight', 1)] if self.graph.has_edge(u, v) else []
+
+    def weight_label(self, u, v):
+        """Return the weight of edge (u, v) as shown on the drawing, noting any parallel edges."""
+        weight = self.graph[u][v].get('weight', 1)
+        weights = self.parallel.get(self._pair(u, v))
+        return f"{weight} (min of {len(weights)})" if weights else str(weight)
+
+    def _add_parallel(self, u, v, weight):
+        """Record one more edge from u to v in multigraph mode. Returns the weight searches should use."""
+        graph = self.graph
+        if not graph.has_edge(u, v):
+            return weight
+        pair = self._pair(u, v)
+        weights = self.parallel.get(pair)
+        if weights is None:
+            weights = self.parallel[pair] = [graph[u][v].get('weight', 1)]
+        weights.append(weight)
+        return min(weights)
+
+    def _index_graph(self):
+        """Build the node and edge position maps from scratch."""
+        self._node_index = {node: i for i, node in enumerate(self.graph)}
+        self._edge_list = []
+        self._edge_index = {}
+        self._reweighted_edges = []
+        self._track_edges(self.graph.edges())
+
+    def _track_nodes(self, nodes):
+        if self._node_index is not None:
+            for node in nodes:
+                self._node_index.setdefault(node, len(self._node_index))
+
+    def _track_edges(self, edges):
+        if self._node_index is not None:
+            for u, v in edges:
+                key = self.edge_key(u, v)
+                if key not in self._edge_index:
+                    self._edge_index[key] = len(self._edge_list)
+                    self._edge_list.append(key)
+                else:
+                    self._reweighted_edges.append(key)
+
+    def add_node(self, node):
+        """Add a node to the graph. Returns False for an empty name."""
+        if not node:
+            return False
+        current = self._dynamic_current()
+        self.graph.add_node(node)
+        self._track_nodes((node,))
+        self.version += 1
+        if current:
+            self._dynamic = (self.version, self._dynamic[1])  # An isolated node changes no distance
+        return True
+
+    def add_edge(self, node1, node2, weight):
+        """Add an edge to the graph with a weight, from node1 to node2 if the graph is directed.
+
+        An existing edge gets the new weight, unless the graph is a multigraph.
+        Then the new edge is added alongside it, and searches use the lighter
+        of the two. Returns False if either endpoint is missing. Raises
+        ValueError if the weight is not a number.
+        """
+        weight = float(weight)
+        if node1 not in self.graph or node2 not in self.graph:
+            return False
+        current = self._dynamic_current()
+        old_weight = self.graph[node1][node2].get('weight', 1) if self.graph.has_edge(node1, node2) else None
+        if self.multigraph:
+            weight = self._add_parallel(node1, node2, weight)
+        self.graph.add_edge(node1, node2, weight=weight)
+        self._track_edges(((node1, node2),))
+        self.version += 1
+        if current:
+            tree = self._dynamic[1]
+            if weight == old_weight:  # A heavier parallel edge changes no distance
+                tree.last_changed = 0
+            else:
+                tree.update_edge(node1, node2, old_weight, weight, directed=self.directed)
+            self.last_changed = tree.last_changed
+            self._dynamic = (self.version, tree)
+        return True
+
+    def _dynamic_current(self):
+        """Whether the incremental tree matches the graph, so an edit can be applied to it."""
+        return self.incremental and self._dynamic is not None and self._dynamic[0] == self.version
+
+    def compact_graph(self):
+        """Return the CSRGraph snapshot of the current graph, rebuilding it if the graph has changed."""
+        if self._csr_version != self.version:
+            from csr_graph import CSRGraph  # NumPy is only needed for the compact backend
+            version = self.version
+            self._csr = CSRGraph.from_networkx(self.graph)
+            self._csr_version = version
+        return self._csr
+
+    def save_snapshot(self, file_path):
+        """Save the graph and node positions to a binary snapshot file.
+
+        An up-to-date contraction hierarchy is saved alongside it.
+        """
+        save_snapshot(file_path, self.compact_graph(), self.pos)
+        if self._hierarchy is not None and not self.hierarchy_stale:
+            save_hierarchy(hierarchy_path(file_path), self._hierarchy[1], self.compact_graph())
+        elif os.path.exists(hierarchy_path(file_path)):
+            os.remove(hierarchy_path(file_path))  # It belongs to the graph that was overwritten
+
+    def load_snapshot(self, file_path):
+        """Replace the graph with a memory-mapped snapshot and switch to the compact backend.
+
+        Node labels are decoded only as they are needed. The networkx graph is
+        built only when something asks for it. The engine becomes directed if
+        the snapshot is. A snapshot holds only the lightest of parallel edges.
+        """
+        with profiler.span('snapshot.load'):
+            csr, pos = load_snapshot(file_path)
+        self.directed = csr.directed
+        self.graph = None  # The position maps are built with the networkx graph, when first needed
+        self._csr = csr
+        self._csr_version = self.version
+        self.pos = pos
+        self.compact = True
+        self._hierarchy = None
+        if not self.directed and os.path.exists(hierarchy_path(file_path)):
+            try:
+                self._hierarchy = (self.version, load_hierarchy(hierarchy_path(file_path), csr))
+            except ValueError:
+                pass  # Saved for another graph; the next 'ch' query builds a new one
+
+    @property
+    def hierarchy_stale(self):
+        """True if a contraction hierarchy was built but the graph has changed since."""
+        return self._hierarchy is not None and self._hierarchy[0] != self.version
+
+    def build_hierarchy(self, cancel_event=None):
+        """Return the contraction hierarchy of the graph, building it first if it is missing or stale.
+
+        This needs NumPy. Raises ValueError for a directed graph, and
+        search.Cancelled soon after cancel_event is set.
+        """
+        if self.directed:
+            raise ValueError("Contraction hierarchies need an undirected graph")
+        if self._hierarchy is None or self.hierarchy_stale:
+            from contraction import ContractionHierarchy
+            version = self.version
+            with profiler.span('hierarchy'):
+                self._hierarchy = (version, ContractionHierarchy.build(self.compact_graph(), cancel_event))
+        return self._hierarchy[1]
+
+    def place_new_nodes(self):
+        """Give positions to nodes that have none, leaving every placed node where it is.
+
+        self.pos is updated in place, so a renderer can tell that no existing node moved.
+        """
+        if len(self.pos) < self.graph.number_of_nodes():
+            if not isinstance(self.pos, dict):
+                self.pos = dict(self.pos)  # Positions loaded from a snapshot are read-only
+            with profiler.span('layout.place', nodes=self.graph.number_of_nodes() - len(self.pos)):
+                self.pos.update(layout.place_new_nodes(self.graph, self.pos))
+
+    def update_layout(self):
+        """Recompute the positions of all nodes with a full spring layout."""
+        self.pos = layout.relayout(self.graph, self.pos)
+
+    def import_csv(self, file_path):
+        """Import graph data from a CSV file of "Node,name" and "Edge,node1,node2,weight" rows.
+
+        A directed graph also takes one-way "Arc,from,to,weight" rows, and
+        each Edge row adds a link in both directions. Returns an ImportReport
+        listing the malformed rows that were skipped.
+        """
+        report = ImportReport()
+        for batch in read_csv_batches(file_path):
+            self.apply_csv_batch(batch, report)
+        return report
+
+    def apply_csv_batch(self, batch, report):
+        """Add the nodes and edges of one parsed CsvBatch, recording what was skipped in report."""
+        with profiler.span('import.batch', nodes=len(batch.nodes), edges=len(batch.edges)):
+            self._apply_csv_batch(batch, report)
+
+    def _apply_csv_batch(self, batch, report):
+        before = self.graph.number_of_nodes()
+        self.graph.add_nodes_from(batch.nodes)
+        self._track_nodes(batch.nodes)
+        report.nodes += self.graph.number_of_nodes() - before
+
+        graph = self.graph
+        edges, missing = [], []
+        for line, node1, node2, weight in batch.edges:
+            if node1 in graph and node2 in graph:
+                edges.append((node1, node2, weight))
+                if self.directed:
+                    edges.append((node2, node1, weight))
+            else:
+                missing.append((line, "edge endpoint is not a node"))
+        for line, node1, node2, weight in batch.arcs:
+            if not self.directed:
+                missing.append((line, "one-way Arc row in an undirected graph"))
+            elif node1 in graph and node2 in graph:
+                edges.append((node1, node2, weight))
+            else:
+                missing.append((line, "edge endpoint is not a node"))
+        if self.multigraph:
+            # Parallel edges are reduced to the lightest here, once, so no query has to
+            for u, v, weight in edges:
+                graph.add_edge(u, v, weight=self._add_parallel(u, v, weight))
+        else:
+            graph.add_weighted_edges_from(edges)
+        self._track_edges((u, v) for u, v, _ in edges)
+        report.edges += len(batch.edges) + len(batch.arcs) - len(missing)  # Rows, whichever way they link
+        report.malformed.extend(sorted(batch.malformed + missing))
+        self.version += 1
+
+    def shortest_path(self, source, target, method='dijkstra', cancel_event=None):
+        """Return (length, path) of the shortest path. Raises nx.NetworkXNoPath if there is none.
+
+        method is one of SEARCH_METHODS. Plain Dijkstra goes through the tree
+        cache; the goal-directed searches run once per query and settle fewer
+        nodes when the target is near. An 'astar' query needs every node
+        placed by place_new_nodes. A 'ch' query builds the hierarchy first if
+        it is missing or stale.
+        """
+        if method not in self.SEARCH_METHODS:
+            raise ValueError(f"Unknown search method {method!r}")
+        counters = SearchCounters() if profiler.enabled else None
+        with profiler.span('query', method=method) as span:
+            try:
+                return self._shortest_path(source, target, method, cancel_event, counters)
+            finally:
+                self.last_counters = counters
+                if counters is not None:
+                    span.set(**counters.as_dict())
+
+    def _shortest_path(self, source, target, method, cancel_event, counters):
+        if self.incremental and method == 'dijkstra':
+            return self._incremental_path(source, target, cancel_event, counters)
+        by_id = self.compact or method == 'ch'  # The hierarchy always works on CSR node ids
+        if by_id:
+            csr = self.compact_graph()
+            source_key, target_key = csr.index[source], csr.index[target]
+            number_of_nodes = csr.number_of_nodes()
+        else:
+            if source not in self.graph:
+                raise nx.NodeNotFound(f"Node {source} not found in graph")
+            source_key, target_key = source, target
+            number_of_nodes = self.graph.number_of_nodes()
+
+        neighbors = counted(cancellable(self._neighbors(), cancel_event), counters)
+        if method == 'bidirectional':
+            reverse_neighbors = None
+            if self.directed:
+                reverse_neighbors = counted(cancellable(self._reverse_neighbors(), cancel_event), counters)
+            path_length, path, self.last_settled = search.bidirectional_dijkstra(neighbors, source_key, target_key,
+                                                                                 reverse_neighbors, counters)
+        elif method == 'astar':
+            coords, scale = self._euclidean_bound()
+            path_length, path, self.last_settled = search.astar(
+                neighbors, source_key, target_key, search.euclidean_heuristic(coords, target_key, scale), counters)
+        elif method == 'alt':
+            path_length, path, self.last_settled = search.astar(
+                neighbors, source_key, target_key,
+                search.alt_heuristic(self._landmark_dists(cancel_event), target_key, self.directed), counters)
+        elif method == 'ch':
+            path_length, path, self.last_settled = self.build_hierarchy(cancel_event).query(source_key, target_key,
+                                                                                            counters)
+        elif self.cache is None or number_of_nodes > self.cache.max_nodes:
+            # A full tree could not be cached, so search only until the target is settled
+            dist, pred = search.dijkstra(neighbors, source_key, target_key, counters=counters)
+            self.last_settled = len(dist)
+            path_length = dist.get(target_key)
+            path = None if path_length is None else unwind(pred, target_key)
+        else:
+            dist, pred = self._tree(source_key, cancel_event, counters)
+            path_length = dist.get(target_key)
+            path = None if path_length is None else unwind(pred, target_key)
+
+        if path is None:
+            raise nx.NetworkXNoPath(f"No path to {target}.")
+        return path_length, [csr.labels[i] for i in path] if by_id else path
+
+    def trace_dijkstra(self, source, target, cancel_event=None):
+        """Record every step of Dijkstra's algorithm from source until target is settled.
+
+        Returns a search.SearchTrace whose nodes and edges are positions in
+        node_index and edge_list, so a renderer can color them directly.
+        """
+        if source not in self.graph:
+            raise nx.NodeNotFound(f"Node {source} not found in graph")
+        with profiler.span('trace') as span:
+            trace = self._trace_dijkstra(source, target, cancel_event)
+            span.set(steps=len(trace))
+        return trace
+
+    def _trace_dijkstra(self, source, target, cancel_event):
+        node_index, edge_index, edge_key = self.node_index, self.edge_index, self.edge_key
+        trace = SearchTrace()
+        pred = {}
+        for kind, node, parent, distance in search.dijkstra_events(
+                cancellable(self._graph_neighbors(), cancel_event), source, target):
+            trace.append(kind, node_index[node], -1 if parent is None else edge_index[edge_key(parent, node)],
+                         distance)
+            if kind == RELAX:
+                pred[node] = parent
+            elif node == target:
+                trace.path, trace.length = unwind(pred, target), distance
+                trace.path_nodes.extend(node_index[v] for v in trace.path)
+                trace.path_edges.extend(edge_index[edge_key(u, v)] for u, v in zip(trace.path[:-1], trace.path[1:]))
+        self.last_settled = trace.kinds.count(SETTLE)
+        return trace
+
+    def _incremental_path(self, source, target, cancel_event=None, counters=None):
+        """Answer a Dijkstra query from the incremental tree, rooting a new one if the source changed.
+
+        Only settled nodes are counted; the tree runs its own searches.
+        """
+        if source not in self.graph:
+            raise nx.NodeNotFound(f"Node {source} not found in graph")
+        dynamic = self._dynamic
+        if not self._dynamic_current() or dynamic[1].source != source:
+            version = self.version
+            reverse_neighbors = self._graph_neighbors(self.graph.pred) if self.directed else None
+            dynamic = (version, DynamicShortestPathTree(self._graph_neighbors(), source, reverse_neighbors,
+                                                        cancel_event))
+            self._dynamic = dynamic
+            self.last_settled = len(dynamic[1].dist)
+        else:
+            self.last_settled = 0  # Answered without searching
+        if counters is not None:
+            counters.settled += self.last_settled
+        path_length, path = dynamic[1].path(target)
+        if path is None:
+            raise nx.NetworkXNoPath(f"No path to {target}.")
+        return path_length, path
+
+    def _neighbors(self):
+        """Return a neighbors(node) function yielding (neighbour, weight) pairs for the active backend."""
+        if self.compact:
+            return self.compact_graph().neighbors
+        return self._graph_neighbors()
+
+    def _reverse_neighbors(self):
+        """Like _neighbors, but following edges backwards. For the searches that need it on directed graphs."""
+        if self.compact:
+            version = self.version
+            csr = self.compact_graph()
+            if self._reverse_csr is None or self._reverse_csr[0] != version:
+                self._reverse_csr = (version, csr.reverse())
+            return self._reverse_csr[1].neighbors
+        return self._graph_neighbors(self.graph.pred if self.directed else None)
+
+    def _graph_neighbors(self, adj=None):
+        """Return a neighbors(node) function over the networkx graph, or over adj, one of its adjacency views."""
+        adj = self.graph.adj if adj is None else adj
+        return lambda node: ((u, d.get('weight', 1)) for u, d in adj[node].items())
+
+    def _euclidean_bound(self):
+        """Return (coords, scale) for the A* heuristic, recomputed when the graph or layout changes.
+
+        The layout is arbitrary, so straight-line distance is scaled down by the
+        smallest weight / length ratio of any edge to keep it a lower bound.
+
+        Queries may run on a worker thread, so the positions are only read,
+        from a copy. Every node must already be placed (see place_new_nodes).
+        Raises ValueError otherwise.
+        """
+        pos = self.pos
+        if self._euclidean is None or self._euclidean[0] != self.version or self._euclidean[1] is not pos:
+            version = self.version
+            placed = pos.copy() if isinstance(pos, dict) else pos  # Positions loaded from a snapshot are read-only
+            try:
+                if self.compact:
+                    csr = self.compact_graph()
+                    coords = [tuple(placed[label]) for label in csr.labels]
+                    edges = csr.edges()
+                else:
+                    coords = {node: tuple(placed[node]) for node in self.graph}
+                    edges = self.graph.edges(data='weight', default=1)
+            except KeyError as exc:
+                raise ValueError(f"Node {exc.args[0]} has no position; A* needs every node placed") from None
+            self._euclidean = (version, pos, coords, search.euclidean_scale(edges, coords))
+        return self._euclidean[2:]
+
+    def _landmark_dists(self, cancel_event=None):
+        """Return the landmark distance maps for ALT, selected again when the graph changes."""
+        if self._landmarks is None or self._landmarks[:2] != (self.version, self.compact):
+            version = self.version
+            nodes = range(self.compact_graph().number_of_nodes()) if self.compact else list(self.graph)
+            neighbors = cancellable(self._neighbors(), cancel_event)
+            self._landmarks = (version, self.compact, search.select_landmarks(neighbors, nodes, self.LANDMARKS))
+        return self._landmarks[2]
+
+    def _tree(self, key, cancel_event=None, counters=None):
+        """Return the (dist, pred) shortest-path tree from key, through the cache.
+
+        key is a node, or a node id with the compact backend. dist is in
+        settle order and pred holds one predecessor per node. The work of the
+        search is added to counters, if given.
+        """
+        version = self.version
+        cache_key = (self.compact, key)
+        tree = self.cache.get(version, cache_key) if self.cache is not None else None
+        if tree is not None:
+            self.last_settled = 0  # Answered without searching
+            return tree
+        if self.compact or counters is not None:
+            # search.dijkstra picks the same predecessors as networkx, and can count its work
+            tree = search.dijkstra(counted(cancellable(self._neighbors(), cancel_event), counters), key,
+                                   counters=counters)
+        else:
+            weight = 'weight' if cancel_event is None else _cancellable_weight('weight', cancel_event)
+            pred, dist = nx.dijkstra_predecessor_and_distance(self.graph, key, weight=weight)
+            # networkx lists equal-length predecessors too, even for the root when weights are zero
+            tree = dist, {v: p[0] for v, p in pred.items() if p and v != key}
+        self.last_settled = len(tree[0])
+        if self.cache is not None:
+            self.cache.put(version, cache_key, *tree)
+        return tree
+
+    def alternate_paths(self, source, target, k, shortest_path=None, cancel_event=None):
+        """Return up to k (path, length) pairs for the next shortest paths after shortest_path."""
+        with profiler.span('alternate_paths', k=k) as span:
+            paths = [(p, length) for p, length in k_shortest_paths(self.graph, source, target, k + 1,
+                                                                   cancel_event=cancel_event)
+                     if p != shortest_path][:k]
+            span.set(paths=len(paths))
+        return paths
+
+    def find_alternate_paths(self, source, target, path_edges, restore_edges=True, cancel_event=None):
+        """Find alternate paths that avoid the edges of the found shortest path.
+
+        With restore_edges=True, each alternate path avoids one path edge and
+        may use all the others. These are the single-edge replacement paths.
+        They all come from one forward and one backward shortest-path tree.
+        With restore_edges=False, the edges are removed cumulatively, as
+        before: the i-th search avoids the first i edges.
+
+        The graph is never copied. Removed edges are hidden from the search.
+        Returns distinct (length, path) pairs sorted by length.
+        """
+        with profiler.span('alternate_paths', restore_edges=restore_edges) as span:
+            paths = self._find_alternate_paths(source, target, path_edges, restore_edges, cancel_event)
+            span.set(paths=len(paths))
+        return paths
+
+    def _find_alternate_paths(self, source, target, path_edges, restore_edges, cancel_event):
+        if restore_edges:
+            alternate_paths = self._replacement_paths(source, target, path_edges, cancel_event)
+        else:
+            alternate_paths = []
+            banned = set()
+            for u, v in path_edges:
+                banned.update(((u, v),) if self.directed else ((u, v), (v, u)))
+                found = self._shortest_path_avoiding(source, target, banned, cancel_event)
+                if found is not None:
+                    alternate_paths.append(found)
+
+        unique = {}
+        for path_length, path in alternate_paths:
+            unique.setdefault(tuple(path), path_length)
+        return sorted(((path_length, list(path)) for path, path_length in unique.items()), key=lambda x: x[0])
+
+    def _shortest_path_avoiding(self, source, target, banned, cancel_event=None):
+        """Return (length, path) avoiding the (u, v) label pairs in banned, or None if there is no path."""
+        if self.compact:
+            csr = self.compact_graph()
+            index = csr.index
+            source_id, target_id = index[source], index[target]
+            dist, pred = search.dijkstra(cancellable(csr.neighbors, cancel_event), source_id, target_id,
+                                         {(index[u], index[v]) for u, v in banned})
+            if target_id not in dist:
+                return None
+            return dist[target_id], [csr.labels[i] for i in unwind(pred, target_id)]
+        try:
+            return nx.single_source_dijkstra(self.graph, source, target=target,
+                                             weight=_cancellable_weight('weight', cancel_event, banned))
+        except nx.NetworkXNoPath:
+            return None
+
+    def _replacement_paths(self, source, target, path_edges, cancel_event=None):
+        """Return (length, path) for the replacement path of every path edge that has one.
+
+        The two-tree method is for undirected graphs. On a directed graph each
+        edge is avoided in a search of its own.
+        """
+        if not path_edges:
+            return []
+        if self.directed:
+            results = (self._shortest_path_avoiding(source, target, {edge}, cancel_event) for edge in path_edges)
+            return [r for r in results if r is not None]
+        path = [path_edges[0][0]] + [v for _, v in path_edges]
+        if self.compact:
+            csr = self.compact_graph()
+            ids = [csr.index[node] for node in path]
+            dist_s, pred_s = self._tree(ids[0], cancel_event)
+            dist_t, pred_t = self._tree(ids[-1], cancel_event)
+            results, unresolved = replacement_paths(ids, dist_s, pred_s, dist_t, pred_t, csr.edges())
+            results = [None if r is None else (r[0], [csr.labels[i] for i in r[1]]) for r in results]
+        else:
+            dist_s, pred_s = self._tree(source, cancel_event)
+            dist_t, pred_t = self._tree(target, cancel_event)
+            results, unresolved = replacement_paths(path, dist_s, pred_s, dist_t, pred_t,
+                                                    self.graph.edges(data='weight', default=1))
+
+        for i in unresolved:
+            u, v = path[i], path[i + 1]
+            results[i] = self._shortest_path_avoiding(source, target, {(u, v), (v, u)}, cancel_event)
+        return [r for r in results if r is not None]
+
+
+class BackgroundQuery:
+    """Run a query function on a worker thread.
+
+    The function is called as func(*args, cancel_event=event). Its result, or
+    the exception it raised, arrives on self.queue. The caller polls the
+    queue, typically from a Tk after() callback. After cancel() the function
+    raises search.Cancelled at its next step, and the caller should ignore
+    whatever arrives.
+    """
+
+    def __init__(self, func, *args):
+        self.func = func
+        self.args = args
+        self.queue = queue.Queue()
+        self.cancel_event = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        """Start the query on the worker thread."""
+        self.thread.start()
+
+    def cancel(self):
+        """Ask the query to stop at its next step."""
+        self.cancel_event.set()
+
+    @property
+    def cancelled(self):
+        """Whether cancel() has been called."""
+        return self.cancel_event.is_set()
+
+    def _run(self):
+        try:
+            self.queue.put(self.func(*self.args, cancel_event=self.cancel_event))
+        except Exception as exc:  # Handed to the GUI thread, which reports it
+            self.queue.put(exc)
@@ -0,0 +1,418 @@
+"""Reading and writing graph files for the Dijkstra Algorithm Visualizer.
+
+CSV files hold one row per node or edge after a header row:
+
+    Node,<name>
+    Edge,<node1>,<node2>,<weight>
+    Arc,<from>,<to>,<weight>
+
+An Edge row links its nodes both ways. An Arc row is a one-way link and
+needs a directed graph.
+
+They are parsed in batches so large files can be loaded on a worker thread
+while the GUI shows progress.
+
+Snapshots are a binary format holding a CSRGraph and its layout. They are
+opened with numpy.memmap, so loading costs no parsing. Processes that open the
+same snapshot share its pages through the OS page cache. A contraction
+hierarchy built for the graph is saved next to the snapshot in the same way.
+"""
+import bisect
+import csv
+import os
+import queue
+import struct
+import threading
+from collections.abc import Mapping, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # Weights are parsed one by one without NumPy
+    np = None
+
+
+class ImportReport:
+    """Counts and malformed rows collected while importing a file."""
+
+    def __init__(self):
+        self.nodes = 0
+        self.edges = 0
+        self.malformed = []  # (line number, reason) pairs
+        self.cancelled = False
+
+    def summary(self, max_rows=5):
+        """Describe the import in one line, listing the first few malformed rows."""
+        text = f"Imported {self.nodes} nodes and {self.edges} edges"
+        if self.cancelled:
+            text = "Import cancelled. " + text
+        if self.malformed:
+            shown = ", ".join(f"line {line}: {reason}" for line, reason in self.malformed[:max_rows])
+            more = f" and {len(self.malformed) - max_rows} more" if len(self.malformed) > max_rows else ""
+            text += f"; skipped {len(self.malformed)} malformed rows ({shown}{more})"
+        return text + "."
+
+
+class CsvBatch:
+    """One batch of parsed CSV rows."""
+
+    def __init__(self, nodes, edges, malformed, progress, arcs=()):
+        self.nodes = nodes  # Node names
+        self.edges = edges  # (line number, node1, node2, weight) tuples with float weights
+        self.arcs = arcs  # The same tuples for one-way Arc rows, from node1 to node2
+        self.malformed = malformed  # (line number, reason) pairs
+        self.progress = progress  # Fraction of the file read so far
+
+
+def parse_weights(weights):
+    """Parse a list of weight strings. Returns floats, with None for entries that are not numbers."""
+    if np is not None:
+        try:
+            return np.asarray(weights, dtype=np.float64).tolist()  # One vectorized pass when all are valid
+        except ValueError:
+            pass
+    parsed = []
+    for weight in weights:
+        try:
+            parsed.append(float(weight))
+        except ValueError:
+            parsed.append(None)
+    return parsed
+
+
+def read_csv_batches(file_path, batch_size=20000, cancel_event=None):
+    """Parse a graph CSV file, yielding a CsvBatch for every batch_size rows.
+
+    Stops early if cancel_event is set.
+    """
+    total = os.path.getsize(file_path) or 1
+    read = 0
+
+    with open(file_path, mode='r', newline='') as file:
+        def lines():
+            nonlocal read
+            for line in file:
+                read += len(line)
+                yield line
+
+        reader = csv.reader(lines())
+        next(reader, None)  # Skip header
+        while cancel_event is None or not cancel_event.is_set():
+            nodes, edge_rows, malformed = [], [], []  # edge_rows also holds Arc rows, marked by their kind
+            for row in reader:
+                kind = row[0] if row else ""
+                if kind == "Node":
+                    if len(row) < 2 or not row[1]:
+                        malformed.append((reader.line_num, "missing node name"))
+                    else:
+                        nodes.append(row[1])
+                elif kind == "Edge" or kind == "Arc":
+                    if len(row) < 4:
+                        malformed.append((reader.line_num, f"expected {kind},node1,node2,weight"))
+                    else:
+                        edge_rows.append((reader.line_num, row[1], row[2], row[3], kind))
+                if len(nodes) + len(edge_rows) + len(malformed) >= batch_size:
+                    break
+            else:
+                if not (nodes or edge_rows or malformed):
+                    return
+
+            edges, arcs = [], []
+            for (line, node1, node2, text, kind), weight in zip(edge_rows, parse_weights([r[3] for r in edge_rows])):
+                if weight is None:
+                    malformed.append((line, f"invalid weight {text!r}"))
+                else:
+                    (edges if kind == "Edge" else arcs).append((line, node1, node2, weight))
+            yield CsvBatch(nodes, edges, malformed, min(read / total, 1.0), arcs)
+
+
+class BackgroundImport:
+    """Parse a CSV file on a worker thread.
+
+    Batches arrive on self.queue, followed by None when the file is done, or by
+    the exception if reading failed. That last entry always arrives, whatever
+    went wrong, and the exception is also kept in self.error. The caller
+    applies the batches, typically from a Tk after() callback, so the graph is
+    only touched on the GUI thread.
+    """
+
+    def __init__(self, file_path, batch_size=20000):
+        self.file_path = file_path
+        self.batch_size = batch_size
+        self.queue = queue.Queue()
+        self.cancel_event = threading.Event()
+        self.error = None
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        """Start reading on the worker thread."""
+        self.thread.start()
+
+    def cancel(self):
+        """Ask the worker to stop after the current batch."""
+        self.cancel_event.set()
+
+    @property
+    def cancelled(self):
+        """Whether cancel() has been called."""
+        return self.cancel_event.is_set()
+
+    def _run(self):
+        try:
+            for batch in read_csv_batches(self.file_path, self.batch_size, self.cancel_event):
+                self.queue.put(batch)
+        except Exception as exc:  # Handed to the GUI thread, which reports it
+            self.error = exc
+        finally:
+            self.queue.put(self.error)  # None when the whole file was read
+
+
+# Snapshot layout: a fixed header followed by arrays, each starting on an 8-byte boundary:
+#   indptr int64[n + 1], indices int32[nnz], weights float64[nnz], pos float64[n, 2] (NaN if unplaced),
+#   label_offsets int64[n + 1], label_order int64[n] (ids sorted by label bytes), label bytes
+# A directed graph stores its out-edges and sets SNAPSHOT_DIRECTED in the flags. Version 1 snapshots have
+# no flags field and are always undirected.
+SNAPSHOT_MAGIC = b"DAVSNAP2"
+SNAPSHOT_HEADER = struct.Struct("<8sQQQQ")  # magic, nodes, adjacency entries, label bytes, flags
+SNAPSHOT_V1_MAGIC = b"DAVSNAP1"
+SNAPSHOT_V1_HEADER = struct.Struct("<8sQQQ")
+SNAPSHOT_DIRECTED = 1
+HIERARCHY_MAGIC = b"DAVCHIE1"
+HIERARCHY_HEADER = struct.Struct("<8sQQQ")  # magic, nodes, graph adjacency entries, upward edges
+
+
+def _sections(header, arrays):
+    """Return (name, dtype, shape, offset) for (name, dtype, shape) arrays stored after header, and the total size."""
+    sections = []
+    offset = header.size
+    for name, dtype, shape in arrays:
+        offset = (offset + 7) // 8 * 8
+        sections.append((name, dtype, shape, offset))
+        offset += int(np.prod(shape)) * np.dtype(dtype).itemsize
+    return sections, offset
+
+
+def _snapshot_sections(n, nnz, label_bytes, header=SNAPSHOT_HEADER):
+    """Return (name, dtype, shape, offset) for every array in a snapshot, and the total size."""
+    return _sections(header, (("indptr", "<i8", (n + 1,)), ("indices", "<i4", (nnz,)),
+                                       ("weights", "<f8", (nnz,)), ("pos", "<f8", (n, 2)),
+                                       ("label_offsets", "<i8", (n + 1,)), ("label_order", "<i8", (n,)),
+                                       ("labels", "u1", (label_bytes,))))
+
+
+def _write_sections(file, sections, arrays):
+    """Write each named array at its section offset, zero-padding the gaps."""
+    for name, dtype, _, offset in sections:
+        file.write(b"\0" * (offset - file.tell()))
+        file.write(np.ascontiguousarray(arrays[name], dtype=dtype).tobytes())
+
+
+def _map_sections(file_path, sections, size):
+    """Memory-map every section of a file. Returns name -> array."""
+    if os.path.getsize(file_path) < size:
+        raise ValueError(f"{file_path} is truncated")
+    arrays = {name: np.memmap(file_path, dtype=dtype, mode="r", offset=offset, shape=shape)
+              for name, dtype, shape, offset in sections if np.prod(shape)}
+    empty = {name: np.empty(shape, dtype=dtype) for name, dtype, shape, _ in sections if not np.prod(shape)}
+    arrays.update(empty)  # numpy.memmap cannot map zero-length arrays
+    return arrays
+
+
+def save_snapshot(file_path, csr, pos):
+    """Write a CSRGraph and the node positions in pos to a binary snapshot file."""
+    n = csr.number_of_nodes()
+    encoded = [str(label).encode("utf-8") for label in csr.labels]
+    label_offsets = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum([len(label) for label in encoded], out=label_offsets[1:])
+    positions = np.full((n, 2), np.nan)
+    for i, label in enumerate(csr.labels):
+        if label in pos:
+            positions[i] = pos[label]
+    arrays = {
+        "indptr": csr.indptr, "indices": csr.indices, "weights": csr.weights, "pos": positions,
+        "label_offsets": label_offsets,
+        "label_order": np.array(sorted(range(n), key=encoded.__getitem__), dtype=np.int64),
+        "labels": np.frombuffer(b"".join(encoded), dtype=np.uint8),
+    }
+
+    sections, _ = _snapshot_sections(n, len(csr.indices), int(label_offsets[-1]))
+    with open(file_path, "wb") as file:
+        file.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, n, len(csr.indices), int(label_offsets[-1]),
+                                        SNAPSHOT_DIRECTED if csr.directed else 0))
+        _write_sections(file, sections, arrays)
+
+
+def load_snapshot(file_path):
+    """Memory-map a snapshot file. Returns (csr, pos) without decoding any node labels."""
+    from csr_graph import CSRGraph
+
+    with open(file_path, "rb") as file:
+        data = file.read(SNAPSHOT_HEADER.size)
+    if data[:8] == SNAPSHOT_V1_MAGIC and len(data) >= SNAPSHOT_V1_HEADER.size:
+        header = SNAPSHOT_V1_HEADER
+        (_, n, nnz, label_bytes), flags = header.unpack(data[:header.size]), 0
+    elif data[:8] == SNAPSHOT_MAGIC and len(data) == SNAPSHOT_HEADER.size:
+        header = SNAPSHOT_HEADER
+        _, n, nnz, label_bytes, flags = header.unpack(data)
+    else:
+        raise ValueError(f"{file_path} is not a graph snapshot")
+    if max(n, nnz, label_bytes) > os.path.getsize(file_path):  # Keeps corrupt counts from overflowing the sizes
+        raise ValueError(f"{file_path} is truncated")
+
+    arrays = _map_sections(file_path, *_snapshot_sections(n, nnz, label_bytes, header))
+    _check_offsets(file_path, arrays["indptr"], nnz)
+    _check_offsets(file_path, arrays["label_offsets"], label_bytes)
+    _check_range(file_path, arrays["indices"], 0, n)
+    _check_range(file_path, arrays["label_order"], 0, n)
+    if not np.all(arrays["weights"] >= 0):  # Also false for NaN
+        raise ValueError(f"{file_path} is corrupt")
+    labels = SnapshotLabels(arrays["labels"], arrays["label_offsets"])
+    index = SnapshotIndex(labels, arrays["label_order"])
+    csr = CSRGraph(labels, arrays["indptr"], arrays["indices"], arrays["weights"], index=index,
+                   directed=bool(flags & SNAPSHOT_DIRECTED))
+    return csr, SnapshotPositions(index, arrays["pos"])
+
+
+def _check_offsets(file_path, offsets, end):
+    """Raise ValueError unless offsets run from 0 to end without decreasing."""
+    if offsets[0] != 0 or offsets[-1] != end or np.any(np.diff(offsets) < 0):
+        raise ValueError(f"{file_path} is corrupt")
+
+
+def _check_range(file_path, values, low, high):
+    """Raise ValueError unless every value lies in [low, high)."""
+    if len(values) and (values.min() < low or values.max() >= high):
+        raise ValueError(f"{file_path} is corrupt")
+
+
+def hierarchy_path(snapshot_path):
+    """Return the path of the contraction hierarchy file saved alongside a snapshot."""
+    return snapshot_path + ".ch"
+
+
+def _hierarchy_sections(n, up):
+    """Return (name, dtype, shape, offset) for every array in a hierarchy file, and the total size."""
+    return _sections(HIERARCHY_HEADER, (("up_indptr", "<i8", (n + 1,)), ("up_indices", "<i4", (up,)),
+                                        ("up_weights", "<f8", (up,)), ("up_middle", "<i4", (up,))))
+
+
+def save_hierarchy(file_path, hierarchy, csr):
+    """Write a ContractionHierarchy of csr to a binary file."""
+    n, up = csr.number_of_nodes(), len(hierarchy.up_indices)
+    sections, _ = _hierarchy_sections(n, up)
+    with open(file_path, "wb") as file:
+        file.write(HIERARCHY_HEADER.pack(HIERARCHY_MAGIC, n, len(csr.indices), up))
+        _write_sections(file, sections, vars(hierarchy))
+
+
+def load_hierarchy(file_path, csr):
+    """Memory-map a contraction hierarchy file. Raises ValueError if it was not built for csr."""
+    from contraction import ContractionHierarchy
+
+    with open(file_path, "rb") as file:
+        data = file.read(HIERARCHY_HEADER.size)
+    if len(data) < HIERARCHY_HEADER.size or data[:8] != HIERARCHY_MAGIC:
+        raise ValueError(f"{file_path} is not a contraction hierarchy")
+    magic, n, nnz, up = HIERARCHY_HEADER.unpack(data)
+    if (n, nnz) != (csr.number_of_nodes(), len(csr.indices)):
+        raise ValueError(f"{file_path} was built for another graph")
+    if up > os.path.getsize(file_path):  # Keeps a corrupt edge count from overflowing the section sizes
+        raise ValueError(f"{file_path} is truncated")
+    arrays = _map_sections(file_path, *_hierarchy_sections(n, up))
+    _check_offsets(file_path, arrays["up_indptr"], up)
+    _check_range(file_path, arrays["up_indices"], 0, n)
+    _check_range(file_path, arrays["up_middle"], -1, n)  # A middle node of -1 marks an original edge
+    return ContractionHierarchy(arrays["up_indptr"], arrays["up_indices"], arrays["up_weights"], arrays["up_middle"])
+
+
+class SnapshotLabels(Sequence):
+    """Node labels of a snapshot, decoded from the mapped bytes one at a time when accessed."""
+
+    def __init__(self, data, offsets):
+        self.data = data
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        return self.encoded(i).decode("utf-8")
+
+    def encoded(self, i):
+        """Return the raw bytes of label i."""
+        if i < 0:
+            i += len(self)
+        return self.data[self.offsets[i]:self.offsets[i + 1]].tobytes()
+
+
+class SnapshotIndex(Mapping):
+    """Label -> node id lookup by binary search over the sorted label order.
+
+    A lookup decodes O(log n) labels, so no dictionary of every label is built.
+    """
+
+    def __init__(self, labels, order):
+        self.labels = labels
+        self.order = order
+
+    def _find(self, label):
+        if not isinstance(label, str):
+            return None
+        key = label.encode("utf-8")
+        keys = _SortedKeys(self.labels, self.order)
+        i = bisect.bisect_left(keys, key)
+        if i < len(keys) and keys[i] == key:
+            return int(self.order[i])
+        return None
+
+    def __getitem__(self, label):
+        node = self._find(label)
+        if node is None:
+            raise KeyError(label)
+        return node
+
+    def __contains__(self, label):
+        return self._find(label) is not None
+
+    def __iter__(self):
+        return iter(self.labels)
+
+    def __len__(self):
+        return len(self.labels)
+
+
+class _SortedKeys(Sequence):
+    """Encoded labels in sorted order, for bisect."""
+
+    def __init__(self, labels, order):
+        self.labels = labels
+        self.order = order
+
+    def __len__(self):
+        return len(self.order)
+
+    def __getitem__(self, i):
+        return self.labels.encoded(int(self.order[i]))
+
+
+class SnapshotPositions(Mapping):
+    """Read-only label -> (x, y) mapping over the mapped position array. Unplaced nodes are absent."""
+
+    def __init__(self, index, positions):
+        self.index = index
+        self.positions = positions
+
+    def __getitem__(self, label):
+        x, y = self.positions[self.index[label]]
+        if x != x:  # NaN marks a node without a position
+            raise KeyError(label)
+        return np.array((x, y))
+
+    def __iter__(self):
+        for i, label in enumerate(self.index.labels):
+            if self.positions[i, 0] == self.positions[i, 0]:
+                yield label
+
+    def __len__(self):
+        return int(np.count_nonzero(~np.isnan(self.positions[:, 0])))
@@ -0,0 +1,132 @@
+"""Node layout for the Dijkstra Algorithm Visualizer.
+
+Positions are computed once and then only extended. New nodes are placed
+next to their already placed neighbours, and existing nodes never move. A
+full spring layout runs only when asked for, usually in the background.
+Both are timed as profiling spans, 'layout.place' and 'layout'. Edge
+direction plays no part in where nodes go.
+"""
+import math
+import random
+import threading
+
+import networkx as nx
+
+from profiling import profiler
+
+SPRING_K = 1.2
+SPRING_ITERATIONS = 50
+LOCAL_RELAX_LIMIT = 500  # Largest neighbourhood that is smoothed after placing new nodes
+RELAYOUT_MAX_NODES = 4000  # A full spring layout of larger graphs takes minutes, so it is only run on request
+
+
+def node_spacing(count):
+    """Typical distance between nodes when count nodes fill the [-1, 1] square used by spring_layout."""
+    return 2.0 / math.sqrt(max(count, 1))
+
+
+def _undirected(graph):
+    """Return graph, or an undirected view of it, so neighbours are linked either way."""
+    return graph.to_undirected(as_view=True) if graph.is_directed() else graph
+
+
+def place_new_nodes(graph, pos, seed=None):
+    """Return positions for every node of graph that has none in pos.
+
+    Nodes already in pos keep their positions. New nodes are visited in
+    breadth-first order from the placed part of the graph. Each one goes near
+    the centroid of its placed neighbours. A node with no placed neighbours
+    goes on a spiral around the drawing. Afterwards a short spring layout
+    smooths only the new nodes, with their neighbours held fixed.
+    """
+    new_nodes = [node for node in graph if node not in pos]
+    if not new_nodes:
+        return {}
+    graph = _undirected(graph)
+    pos = dict(pos)
+
+    rng = random.Random(seed)
+    spacing = node_spacing(graph.number_of_nodes())
+    placed = [node for node in graph if node in pos]
+    cx = sum(pos[node][0] for node in placed) / len(placed) if placed else 0.0
+    cy = sum(pos[node][1] for node in placed) / len(placed) if placed else 0.0
+
+    remaining = set(new_nodes)  # Breadth-first from the placed nodes, so neighbours are placed first
+    frontier = [node for node in new_nodes if any(nbr in pos for nbr in graph[node])]
+    unvisited = iter(new_nodes)  # Start points for components with no placed nodes
+    order = []
+    while remaining:
+        if not frontier:
+            frontier = [next(node for node in unvisited if node in remaining)]
+        next_frontier = []
+        for node in frontier:
+            if node not in remaining:
+                continue
+            remaining.discard(node)
+            order.append(node)
+            next_frontier.extend(nbr for nbr in graph[node] if nbr in remaining)
+        frontier = next_frontier
+
+    spiral = len(placed)
+    for node in order:
+        neighbours = [pos[nbr] for nbr in graph[node] if nbr in pos]
+        if neighbours:
+            x = sum(p[0] for p in neighbours) / len(neighbours)
+            y = sum(p[1] for p in neighbours) / len(neighbours)
+            angle = rng.uniform(0, 2 * math.pi)
+            pos[node] = (x + spacing * math.cos(angle), y + spacing * math.sin(angle))
+        else:
+            # Golden-angle spiral: each node gets its own spot at roughly uniform density
+            spiral += 1
+            radius = spacing * math.sqrt(spiral)
+            angle = spiral * 2.399963
+            pos[node] = (cx + radius * math.cos(angle), cy + radius * math.sin(angle))
+
+    new_set = set(new_nodes)
+    local = set(new_nodes)
+    for node in new_nodes:
+        local.update(graph[node])
+    fixed = [node for node in local if node not in new_set]
+    if fixed and len(local) <= LOCAL_RELAX_LIMIT:
+        relaxed = nx.spring_layout(graph.subgraph(local), pos={node: pos[node] for node in local},
+                                   fixed=fixed, k=spacing, iterations=20, seed=seed)
+        pos.update((node, tuple(relaxed[node])) for node in new_nodes)
+    return {node: pos[node] for node in new_nodes}
+
+
+def relayout(graph, pos=None, seed=None):
+    """Run a full spring layout of graph, starting from pos where it is given."""
+    if graph.number_of_nodes() == 0:
+        return {}
+    initial = {node: pos[node] for node in graph if node in pos} if pos else None
+    with profiler.span('layout', nodes=graph.number_of_nodes()):
+        return nx.spring_layout(_undirected(graph), pos=initial or None, k=SPRING_K, iterations=SPRING_ITERATIONS,
+                                seed=seed)
+
+
+class BackgroundRelayout:
+    """Run relayout() on a worker thread over a copy of the graph, so edits made meanwhile are safe.
+
+    If the layout fails, result stays None and error holds the exception.
+    """
+
+    def __init__(self, graph, pos):
+        self.graph = graph.copy()
+        self.pos = dict(pos)
+        self.result = None
+        self.error = None
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        """Start the layout on the worker thread."""
+        self.thread.start()
+
+    def done(self):
+        """Whether the layout has finished. The positions are then in self.result, unless self.error is set."""
+        return not self.thread.is_alive()
+
+    def _run(self):
+        try:
+            self.result = relayout(self.graph, self.pos)
+        except Exception as exc:  # Handed to the GUI thread, which reports it
+            self.error = exc
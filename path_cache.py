@@ -0,0 +1,58 @@
+"""Cache of shortest-path trees for repeated queries from the same source.
+
+A tree is a (dist, pred) pair of dicts covering every node reachable from
+the source. Once a source's tree is cached, any target is answered by
+walking pred back from the target, in O(path length).
+"""
+from collections import OrderedDict
+
+
+class ShortestPathTreeCache:
+    """Per-source shortest-path trees, evicted least recently used first.
+
+    The memory bound is max_nodes, the total number of nodes held across all
+    cached trees. Every tree belongs to one graph version. The whole cache is
+    dropped the first time it is used with a newer version.
+    """
+
+    def __init__(self, max_nodes=1_000_000):
+        self.max_nodes = max_nodes
+        self.trees = OrderedDict()
+        self.size = 0  # Nodes held across all trees
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, version, key):
+        """Return the cached (dist, pred) tree for key, or None."""
+        if version != self.version:
+            self.clear()
+            self.version = version
+        tree = self.trees.get(key)
+        if tree is None:
+            self.misses += 1
+            return None
+        self.trees.move_to_end(key)
+        self.hits += 1
+        return tree
+
+    def put(self, version, key, dist, pred):
+        """Store a tree, evicting the least recently used ones to stay within max_nodes."""
+        if version != self.version or len(dist) > self.max_nodes:
+            return
+        if key in self.trees:
+            self.size -= len(self.trees.pop(key)[0])
+        while self.trees and self.size + len(dist) > self.max_nodes:
+            _, (old_dist, _) = self.trees.popitem(last=False)
+            self.size -= len(old_dist)
+        self.trees[key] = (dist, pred)
+        self.size += len(dist)
+
+    def clear(self):
+        """Drop every cached tree. The hit and miss counters are kept."""
+        self.trees.clear()
+        self.size = 0
+
+    def stats(self):
+        """Return the hit and miss counters and the current size."""
+        return {"hits": self.hits, "misses": self.misses, "trees": len(self.trees), "nodes": self.size}
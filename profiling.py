@@ -0,0 +1,131 @@
+"""Timing spans for the Dijkstra Algorithm Visualizer.
+
+The engine and the renderer wrap their stages in profiler.span(name):
+queries, alternate paths, layout, imports and drawing. While profiling is
+off, span() returns a shared do-nothing context, so an instrumented stage
+costs one attribute check.
+
+Once enabled, every span records its duration under its name in
+profiler.last, which the GUIs show in a status bar. With a trace file, each
+span is also written to it as one JSON object per line:
+
+    {"span": "query", "start": 1700000000.123, "ms": 12.5, "thread": "MainThread", "method": "dijkstra", ...}
+
+Setting the DIJKSTRA_TRACE environment variable to a file name enables
+profiling with that trace file at import time, for the GUIs, batch jobs and
+benchmarks alike.
+"""
+import json
+import os
+import threading
+import time
+
+TRACE_ENV = 'DIJKSTRA_TRACE'
+
+
+class _NullSpan:
+    """Stands in for a span while profiling is off."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **fields):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+    """One timed stage. set() adds fields, such as search counters, to its record."""
+
+    def __init__(self, profiler, name, fields):
+        self.profiler = profiler
+        self.name = name
+        self.fields = fields
+
+    def __enter__(self):
+        self.wall = time.time()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        seconds = time.perf_counter() - self.start
+        if exc_type is not None:
+            self.fields['error'] = exc_type.__name__
+        self.profiler.record(self, seconds)
+        return False
+
+    def set(self, **fields):
+        self.fields.update(fields)
+
+
+class Profiler:
+    """Collects spans while enabled and optionally writes them to a JSON-lines trace file.
+
+    Spans may end on worker threads; writes to the trace file are serialized.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.trace_path = None
+        self.last = {}  # Span name -> (seconds, fields) of the latest span with that name
+        self._file = None
+        self._lock = threading.Lock()
+
+    def enable(self, trace_path=None):
+        """Start recording spans, appending them to trace_path if it is given."""
+        self.close()
+        if trace_path:
+            self._file = open(trace_path, 'a', encoding='utf-8')
+            self.trace_path = trace_path
+        self.enabled = True
+
+    def disable(self):
+        """Stop recording spans and close the trace file."""
+        self.enabled = False
+        self.close()
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+                self.trace_path = None
+
+    def span(self, name, **fields):
+        """Return a context that times the stage name. fields are stored with it."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return Span(self, name, fields)
+
+    def record(self, span, seconds):
+        self.last[span.name] = (seconds, span.fields)
+        if self._file is None:
+            return
+        line = json.dumps({'span': span.name, 'start': round(span.wall, 6), 'ms': round(seconds * 1000, 3),
+                           'thread': threading.current_thread().name, **span.fields}, default=str)
+        with self._lock:
+            if self._file is not None:
+                self._file.write(line + '\n')
+                self._file.flush()
+
+    def summary(self, names=None):
+        """Describe the latest span of each name in one line, for a status bar."""
+        parts = []
+        for name in names or sorted(self.last):
+            if name not in self.last:
+                continue
+            seconds, fields = self.last[name]
+            counts = ', '.join(f"{key} {value}" for key, value in fields.items()
+                               if isinstance(value, int) and not isinstance(value, bool))
+            parts.append(f"{name} {seconds * 1000:.1f} ms" + (f" ({counts})" if counts else ""))
+        return " | ".join(parts)
+
+
+profiler = Profiler()
+if os.environ.get(TRACE_ENV):
+    profiler.enable(os.environ[TRACE_ENV])
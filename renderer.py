@@ -0,0 +1,329 @@
+"""Retained-mode drawing of the graph for the Dijkstra Algorithm Visualizer.
+
+The node PathCollection and the edge LineCollection are created once and
+kept. Highlighting a path does not redraw them. It sets the nodes and edges
+of a pair of overlay collections that are drawn on top, then blits only the
+axes from a cached background.
+
+The detail drawn depends on the view, and is picked again whenever the
+view is panned or zoomed:
+
+* Only the nodes and edges inside the view are handed to the collections.
+* Nodes shrink as more of them are visible. Node names appear only when a
+  few nodes are visible, and edge weights when a few edges are.
+* When very many nodes are visible, nodes and edges are replaced by density
+  tiles: a grid over the view, shaded by how many nodes fall in each cell.
+* Highlighted paths are drawn on top of all of this. Their nodes keep the
+  full size and their labels until a long stretch of the path is in view.
+
+Edges of a directed graph get arrowheads, sized to the nodes in view, and
+their weights sit nearer the node they point at, so the labels of u -> v
+and v -> u do not cover each other.
+
+Node positions are kept in the engine's node_index / edge_index order, so a
+path element is found with one dict lookup.
+
+Drawing and view changes are timed as the 'render' and 'render.view'
+profiling spans.
+"""
+from itertools import islice
+
+import numpy as np
+from matplotlib.collections import LineCollection, PolyCollection
+from matplotlib.colors import to_rgba
+
+from profiling import profiler
+
+NODE_COLOR = 'lightblue'
+EDGE_COLOR = 'black'
+HIGHLIGHT_COLOR = 'orange'
+NODE_SIZE = 700
+MIN_NODE_SIZE = 4
+TRANSPARENT = (0.0, 0.0, 0.0, 0.0)
+
+DETAIL_NODES = 50  # Up to this many visible nodes are drawn at full size
+NODE_LABEL_LIMIT = 100  # Node names are drawn when at most this many nodes are visible
+EDGE_LABEL_LIMIT = 60  # Edge weights are drawn when at most this many edges are visible
+HIGHLIGHT_LIMIT = 30  # Highlighted nodes are drawn at full size, with labels, when at most this many are visible
+TILE_LIMIT = 5000  # Above this many visible nodes, density tiles are drawn instead
+TILE_BINS = 64  # Tiles across the view
+ZOOM_STEP = 1.25  # View scale per mouse wheel step
+ARROW_SIZE = 8  # Smallest arrowhead length in points
+
+
+class GraphRenderer:
+    """Draws a GraphEngine's graph on a matplotlib Axes and highlights paths without redrawing the whole figure."""
+
+    def __init__(self, ax, canvas):
+        self.ax = ax
+        self.canvas = canvas
+        self.xy = np.empty((0, 2))  # Node positions in engine.node_index order
+        self.segments = np.empty((0, 2, 2))  # Edge segments in engine.edge_list order
+        self.names = []  # Node names in engine.node_index order
+        self.weights = []  # Edge weight label texts in engine.edge_list order
+        self.labels = []  # Label artists for the visible part of the view
+        self.base_nodes = self.base_edges = self.tiles = self.arrows = None
+        self.directed = False
+        self.highlight_nodes = None  # Overlay collections, drawn by blitting
+        self.highlight_edges = None
+        self.highlighted = []  # Node name artists redrawn on top of the overlay
+        self.highlighted_weights = []  # Edge weight artists redrawn on top of the overlay
+        self.node_size = NODE_SIZE
+        self._autoscaling = False  # Set while extend() changes the limits, so the view is chosen once
+        self._drawn_version = None
+        self._reweighted = None  # engine.reweighted_edges, and how many of its entries are drawn
+        self._reweighted_drawn = 0
+        self._drawn_pos = None
+        self._background = None
+        self.canvas.mpl_connect('draw_event', self._on_draw)
+        self.canvas.mpl_connect('scroll_event', self._on_scroll)
+
+    def draw(self, engine, highlights=()):
+        """Show the engine's graph with (nodes, edges, color) highlights.
+
+        If nodes or edges were added since the last call, only they are
+        added to the collections. Everything is rebuilt only when the
+        positions were replaced, for example by a full relayout. Otherwise
+        only the highlights change.
+        """
+        with profiler.span('render', nodes=len(engine.node_index)) as span:
+            span.set(mode=self._draw(engine, highlights))
+
+    def _draw(self, engine, highlights):
+        if (self._drawn_pos is not engine.pos or len(self.xy) > len(engine.node_index)
+                or self.directed != engine.directed or self._reweighted is not engine.reweighted_edges):
+            self.rebuild(engine)
+            mode = 'rebuild'
+        elif self._drawn_version != engine.version:
+            self.extend(engine)
+            mode = 'extend'
+        else:
+            self.set_highlights(engine, highlights)
+            self.blit()
+            return 'highlight'
+        self._drawn_version = engine.version
+        self._drawn_pos = engine.pos
+        self.set_highlights(engine, highlights)
+        self.canvas.draw()  # Full draw; _on_draw caches the background and draws the overlay
+        return mode
+
+    def rebuild(self, engine):
+        """Create the collections for every node and edge of the graph."""
+        ax = self.ax
+        ax.clear()
+        ax.set_title("Graph Visualization")
+        ax.set_axis_off()
+        self._background = None
+        self.xy = np.empty((0, 2))
+        self.segments = np.empty((0, 2, 2))
+        self.names = []
+        self.weights = []
+        self.labels = []
+        self.highlighted = []
+        self.highlighted_weights = []
+        self.directed = engine.directed
+        self._reweighted = engine.reweighted_edges
+        self._reweighted_drawn = len(self._reweighted)  # Every label is made from scratch below
+        self.base_edges = ax.add_collection(LineCollection([], colors=EDGE_COLOR, zorder=1))
+        self.arrows = ax.add_collection(PolyCollection([], facecolors=EDGE_COLOR, edgecolors='none', zorder=1,
+                                                       visible=self.directed), autolim=False)
+        self.base_nodes = ax.scatter([], [], s=NODE_SIZE, c=NODE_COLOR, zorder=2)
+        self.tiles = ax.add_collection(PolyCollection([], cmap='Blues', zorder=2, visible=False), autolim=False)
+        self.highlight_edges = ax.add_collection(LineCollection([], linewidths=2, zorder=3, animated=True))
+        self.highlight_nodes = ax.scatter([], [], s=NODE_SIZE, zorder=4, animated=True)
+        ax.callbacks.connect('xlim_changed', self.update_view)
+        ax.callbacks.connect('ylim_changed', self.update_view)
+        self.extend(engine)
+
+    def extend(self, engine):
+        """Add nodes and edges added since the last draw, and refresh the weights of edges added again."""
+        ax = self.ax
+        pos = engine.pos
+        nodes = list(islice(engine.node_index, len(self.xy), None))
+        edges = engine.edge_list[len(self.segments):]
+
+        # Only the edges add_edge or an import gave a new weight since the last draw
+        edge_index = engine.edge_index
+        for u, v in self._reweighted[self._reweighted_drawn:]:
+            i = edge_index[(u, v)]
+            if i < len(self.weights):  # New edges get their label below
+                self.weights[i] = engine.weight_label(u, v)
+        self._reweighted_drawn = len(self._reweighted)
+
+        if nodes:
+            xy = np.array([pos[node] for node in nodes], dtype=float)
+            self.xy = np.concatenate([self.xy, xy])
+            self.names += [str(node) for node in nodes]
+            ax.update_datalim(xy)
+        if edges:
+            segments = np.array([(pos[u], pos[v]) for u, v in edges], dtype=float).reshape(-1, 2, 2)
+            self.segments = np.concatenate([self.segments, segments])
+            self.weights += [engine.weight_label(u, v) for u, v in edges]
+        if nodes or edges:
+            self._autoscaling = True
+            try:
+                ax.autoscale_view()
+                ax.margins(0.1)
+                ax.get_xlim()  # matplotlib applies autoscaling lazily; reading the limits applies it now
+            finally:
+                self._autoscaling = False
+        self.update_view()
+
+    def update_view(self, ax=None):
+        """Pick the level of detail for the current view and hand only the visible part to the artists."""
+        if self.base_nodes is None or self._autoscaling:
+            return
+        with profiler.span('render.view') as span:
+            self._update_view(span)
+
+    def _update_view(self, span):
+        ax = self.ax
+        (x0, x1), (y0, y1) = sorted(ax.get_xlim()), sorted(ax.get_ylim())
+        xy = self.xy
+        in_view = (xy[:, 0] >= x0) & (xy[:, 0] <= x1) & (xy[:, 1] >= y0) & (xy[:, 1] <= y1)
+        visible = int(np.count_nonzero(in_view))
+        for label in self.labels:
+            label.remove()
+        self.labels = []
+
+        tiled = visible > TILE_LIMIT
+        span.set(visible=visible, tiled=tiled)
+        self.base_nodes.set_visible(not tiled)
+        self.base_edges.set_visible(not tiled)
+        self.arrows.set_visible(self.directed and not tiled)
+        self.tiles.set_visible(tiled)
+        if tiled:
+            self.node_size = MIN_NODE_SIZE
+            counts, xs, ys = np.histogram2d(xy[in_view, 0], xy[in_view, 1], bins=TILE_BINS, range=[[x0, x1], [y0, y1]])
+            i, j = np.nonzero(counts)
+            self.tiles.set_verts(np.stack([np.column_stack([xs[i], ys[j]]), np.column_stack([xs[i + 1], ys[j]]),
+                                           np.column_stack([xs[i + 1], ys[j + 1]]),
+                                           np.column_stack([xs[i], ys[j + 1]])], axis=1))
+            self.tiles.set_array(counts[i, j])
+            self.tiles.set_clim(0, counts.max())
+            return
+
+        lo, hi = self.segments.min(axis=1), self.segments.max(axis=1)
+        edges_in_view = (hi[:, 0] >= x0) & (lo[:, 0] <= x1) & (hi[:, 1] >= y0) & (lo[:, 1] <= y1)
+        self.node_size = max(MIN_NODE_SIZE, NODE_SIZE * min(1.0, DETAIL_NODES / max(visible, 1)))
+        self.base_nodes.set_offsets(xy[in_view])
+        self.base_nodes.set_sizes([self.node_size])
+        self.base_edges.set_segments(self.segments[edges_in_view])
+        if self.directed:
+            self.arrows.set_verts(self._arrowheads(self.segments[edges_in_view]))
+
+        if visible <= NODE_LABEL_LIMIT:
+            fontsize = 12 if self.node_size >= NODE_SIZE / 2 else 8
+            self.labels += [ax.text(x, y, self.names[i], fontsize=fontsize, color='black', fontweight='bold',
+                                    ha='center', va='center', zorder=5, clip_on=True)
+                            for i, (x, y) in zip(np.flatnonzero(in_view), xy[in_view])]
+        edge_ids = np.flatnonzero(edges_in_view)
+        if len(edge_ids) <= EDGE_LABEL_LIMIT:
+            self.labels += [self._edge_label(i, animated=False) for i in edge_ids]
+        span.set(labels=len(self.labels))
+
+    def _arrowheads(self, segments):
+        """Return a triangle for each segment, with its tip on the edge of the node the segment points at."""
+        to_display = self.ax.transData
+        start, end = to_display.transform(segments[:, 0]), to_display.transform(segments[:, 1])
+        points = self.ax.figure.dpi / 72
+        radius = np.sqrt(self.node_size) / 2 * points  # Marker sizes are areas in points squared
+        length = max(ARROW_SIZE * points, 0.8 * radius)
+        direction = end - start
+        norm = np.hypot(direction[:, 0], direction[:, 1])[:, None]
+        direction = direction / np.where(norm == 0, 1, norm)  # Self-loops get an empty triangle
+        normal = direction[:, ::-1] * (-1, 1)
+        tip = end - direction * radius
+        base = tip - direction * length
+        triangles = np.stack([tip, base + normal * length / 2, base - normal * length / 2], axis=1)
+        return to_display.inverted().transform(triangles.reshape(-1, 2)).reshape(-1, 3, 2)
+
+    def _edge_label(self, i, animated):
+        start, end = self.segments[i]
+        x, y = start + (end - start) * (2 / 3 if self.directed else 1 / 2)
+        return self.ax.text(x, y, str(self.weights[i]), fontsize=10, color='red', ha='center', va='center',
+                            zorder=5, animated=animated, clip_on=True,
+                            bbox=dict(boxstyle='round', ec='white', fc='white'))
+
+    def set_highlights(self, engine, highlights):
+        """Set the overlay colors for (nodes, edges, color) highlights; later entries win."""
+        node_colors = np.zeros((len(self.xy), 4))
+        edge_colors = np.zeros((len(self.segments), 4))
+        node_index, edge_index = engine.node_index, engine.edge_index
+        labelled_nodes, labelled_edges = [], []
+        for nodes, edges, color in highlights:
+            rgba = to_rgba(color)
+            for u, v in edges or ():
+                i = edge_index[engine.edge_key(u, v)]
+                edge_colors[i] = rgba
+                labelled_edges.append(i)
+            for node in nodes or ():
+                i = node_index[node]
+                node_colors[i] = rgba
+                labelled_nodes.append(i)
+        self._set_overlay(node_colors, edge_colors, labelled_nodes, labelled_edges)
+
+    def set_overlay(self, node_colors, edge_colors, labelled_nodes=()):
+        """Show RGBA overlay colors given per node and edge position, then blit.
+
+        Nothing else is redrawn, so this is cheap enough to call once per
+        animation frame. The labels of labelled_nodes are drawn on top.
+        """
+        self._set_overlay(node_colors, edge_colors, labelled_nodes, ())
+        self.blit()
+
+    def _set_overlay(self, node_colors, edge_colors, labelled_nodes, labelled_edges):
+        """Hand only the colored nodes and edges to the overlay collections, with labels for the given ones."""
+        for label in self.highlighted + self.highlighted_weights:
+            label.remove()
+        nodes = np.flatnonzero(node_colors[:, 3] > 0)
+        edges = np.flatnonzero(edge_colors[:, 3] > 0)
+        self.highlight_nodes.set_offsets(self.xy[nodes])
+        self.highlight_nodes.set_facecolor(node_colors[nodes])
+        self.highlight_edges.set_segments(self.segments[edges])
+        self.highlight_edges.set_color(edge_colors[edges])
+        self.highlighted = [self.ax.text(x, y, self.names[i], fontsize=12, color='black', fontweight='bold',
+                                         ha='center', va='center', zorder=5, animated=True, clip_on=True)
+                            for i, (x, y) in zip(labelled_nodes, self.xy[list(labelled_nodes)])]
+        self.highlighted_weights = [self._edge_label(i, animated=True) for i in labelled_edges]
+
+    def blit(self):
+        """Redraw only the overlay and its labels on top of the cached background."""
+        if self._background is None:
+            self.canvas.draw()
+            return
+        self.canvas.restore_region(self._background)
+        self._draw_overlay()
+        self.canvas.blit(self.ax.bbox)
+
+    def _draw_overlay(self):
+        if self.highlight_nodes is None:
+            return
+        (x0, x1), (y0, y1) = sorted(self.ax.get_xlim()), sorted(self.ax.get_ylim())
+        xy = self.highlight_nodes.get_offsets()
+        visible = np.count_nonzero((xy[:, 0] >= x0) & (xy[:, 0] <= x1) & (xy[:, 1] >= y0) & (xy[:, 1] <= y1))
+        detailed = visible <= HIGHLIGHT_LIMIT
+        self.highlight_nodes.set_sizes([NODE_SIZE if detailed else self.node_size])
+        self.ax.draw_artist(self.highlight_edges)
+        self.ax.draw_artist(self.highlight_nodes)
+        if not detailed:
+            return
+        for label in self.highlighted + self.highlighted_weights:
+            x, y = label.get_position()
+            if x0 <= x <= x1 and y0 <= y <= y1:
+                self.ax.draw_artist(label)
+
+    def _on_draw(self, event):
+        """After every full draw, cache the background and put the overlay back on top."""
+        self._background = self.canvas.copy_from_bbox(self.ax.bbox)
+        self._draw_overlay()
+
+    def _on_scroll(self, event):
+        """Zoom in or out around the mouse pointer."""
+        if event.inaxes is not self.ax:
+            return
+        scale = 1 / ZOOM_STEP if event.button == 'up' else ZOOM_STEP
+        (x0, x1), (y0, y1) = self.ax.get_xlim(), self.ax.get_ylim()
+        self.ax.set_xlim(event.xdata - (event.xdata - x0) * scale, event.xdata + (x1 - event.xdata) * scale)
+        self.ax.set_ylim(event.ydata - (event.ydata - y0) * scale, event.ydata + (y1 - event.ydata) * scale)
+        self.canvas.draw_idle()
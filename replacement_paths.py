@@ -0,0 +1,96 @@
+"""Single-edge replacement paths for undirected graphs.
+
+For every edge e_i of a shortest s-t path P, the replacement path is the
+shortest s-t path that avoids e_i but may use every other edge. All of them
+come from one shortest-path tree rooted at s and one rooted at t
+(Malik, Mittal and Gupta, 1989):
+
+* Removing e_i = (p_i, p_i+1) splits the s-tree in two. Give each node the
+  index of the last path node on its tree path from s. Nodes with label <= i
+  stay on the source side.
+* Every detour leaves the source side over one non-path edge (u, v) with
+  label(u) <= i < label(v). The detour is then s ~> u -> v ~> t, with length
+  dist_s(u) + w(u, v) + dist_t(v).
+* An edge with labels a < b is therefore a candidate for every i in [a, b).
+  Candidates are taken cheapest first and assigned to the indices still
+  free, using a union-find skip list. The total cost is two Dijkstra runs
+  plus sorting the edges.
+
+The functions work on plain dicts so both the networkx and the CSR backends
+can use them.
+"""
+
+from search import unwind
+
+
+def replacement_paths(path, dist_s, pred_s, dist_t, pred_t, edges):
+    """Return the replacement path for every edge of path.
+
+    dist_s / pred_s and dist_t / pred_t describe full shortest-path trees
+    rooted at path[0] and path[-1]. dist_s must be in the order the nodes were
+    settled, and each pred map holds one predecessor per node. edges yields
+    (u, v, weight) for every edge in at least one orientation.
+
+    Returns (results, unresolved). results has one entry per path edge: a
+    (length, nodes) pair, or None if removing that edge disconnects the ends.
+    unresolved lists the indices where ties between equal-length paths made
+    the tree-based detour invalid, for example through zero-weight edges.
+    Callers should recompute those entries directly.
+    """
+    m = len(path) - 1
+    position = {node: i for i, node in enumerate(path)}
+    pred_s = dict(pred_s)
+    pred_s.update(zip(path[1:], path[:-1]))  # The s-tree must contain the path itself
+
+    # Label every node reached from the source by the path node its s-tree branch hangs off
+    label = {}
+    for node in dist_s:  # Settle order: a node's tree parent is always labelled before it
+        if node in position:
+            label[node] = position[node]
+        else:
+            label[node] = label[pred_s[node]]
+
+    candidates = []
+    for u, v, w in edges:
+        if u not in label or v not in label or label[u] == label[v]:
+            continue
+        if label[u] > label[v]:
+            u, v = v, u
+        a, b = label[u], label[v]
+        if b == a + 1 and path[a] == u and path[b] == v:
+            continue  # The path edge itself
+        if v in dist_t:
+            candidates.append((dist_s[u] + w + dist_t[v], a, b, u, v))
+    candidates.sort(key=lambda c: c[0])
+
+    best = [None] * m
+    skip = list(range(m + 1))  # skip[i] leads to the next index >= i still without a detour
+
+    def find(i):
+        while skip[i] != i:
+            skip[i] = skip[skip[i]]
+            i = skip[i]
+        return i
+
+    for length, a, b, u, v in candidates:
+        i = find(a)
+        while i < b:
+            best[i] = (length, u, v)
+            skip[i] = i + 1
+            i = find(i + 1)
+
+    results, unresolved = [], []
+    for i, entry in enumerate(best):
+        if entry is None:
+            results.append(None)
+            continue
+        length, u, v = entry
+        nodes = unwind(pred_s, u) + unwind(pred_t, v)[::-1]
+        removed = {path[i], path[i + 1]}
+        uses_removed = any({x, y} == removed for x, y in zip(nodes[:-1], nodes[1:]))
+        if uses_removed or len(set(nodes)) != len(nodes):
+            unresolved.append(i)
+            results.append(None)
+        else:
+            results.append((length, nodes))
+    return results, unresolved
@@ -0,0 +1,347 @@
+"""Shortest-path search kernels for the Dijkstra Algorithm Visualizer.
+
+Every kernel walks the graph through a neighbors(node) function that returns
+(neighbour, weight) pairs, so the same code serves the networkx graph and the
+CSR backend. Each one reports how many nodes it settled.
+
+* dijkstra: plain one-directional search. Ties are broken the way networkx
+  breaks them, so the paths match nx.single_source_dijkstra.
+* bidirectional_dijkstra: searches from both ends and stops once the two
+  frontiers prove the best meeting point.
+* astar: Dijkstra guided by a lower bound on the remaining distance.
+* ALT: A* whose lower bound comes from distances to a few landmarks and the
+  triangle inequality.
+
+A search is made cancellable by wrapping its neighbors function with
+cancellable(). It then raises Cancelled at the next node it expands after
+the cancel event is set.
+
+dijkstra_events runs the plain search step by step for animation, and a
+SearchTrace records those steps compactly for replay.
+
+For profiling, a kernel adds its settled nodes and heap pushes and pops to
+a SearchCounters passed as counters. It does this once, when it returns.
+Relaxed edges are counted by wrapping its neighbors function with
+counted(). Without counters, neither costs anything.
+"""
+import math
+from array import array
+from heapq import heappop, heappush
+from itertools import count
+from math import inf
+
+
+class Cancelled(Exception):
+    """Raised by a search whose cancel event was set."""
+
+
+def cancellable(neighbors, cancel_event):
+    """Wrap a neighbors function so it raises Cancelled once cancel_event is set.
+
+    Returns neighbors unchanged if cancel_event is None.
+    """
+    if cancel_event is None:
+        return neighbors
+
+    def checked(node):
+        if cancel_event.is_set():
+            raise Cancelled()
+        return neighbors(node)
+    return checked
+
+
+def dijkstra(neighbors, source, target=None, banned=None, counters=None):
+    """Run Dijkstra's algorithm from source.
+
+    Stops as soon as target is settled. Edges whose (u, v) pair is in banned
+    are ignored. Returns (dist, pred) dicts. dist holds the settled nodes in
+    settle order, and pred holds one predecessor for every reached node.
+    """
+    dist = {}
+    seen = {source: 0}
+    pred = {}
+    c = count()
+    heap = [(0, next(c), source)]
+    while heap:
+        d, _, v = heappop(heap)
+        if v in dist:
+            continue
+        dist[v] = d
+        if v == target:
+            break
+        for u, w in neighbors(v):
+            if banned is not None and (v, u) in banned:
+                continue
+            vu_dist = d + w
+            if u in dist:
+                if vu_dist < dist[u]:
+                    raise ValueError("Contradictory paths found:", "negative weights?")
+            elif u not in seen or vu_dist < seen[u]:
+                seen[u] = vu_dist
+                heappush(heap, (vu_dist, next(c), u))
+                pred[u] = v
+    if counters is not None:
+        pushes = next(c)
+        counters.add(len(dist), pushes, pushes - len(heap))
+    return dist, pred
+
+
+class SearchCounters:
+    """Work done by one or more searches.
+
+    relaxed counts the edges examined from settled nodes, whether or not
+    they improved a distance.
+    """
+
+    def __init__(self):
+        self.settled = 0
+        self.relaxed = 0
+        self.heap_pushes = 0
+        self.heap_pops = 0
+
+    def add(self, settled, heap_pushes, heap_pops):
+        self.settled += settled
+        self.heap_pushes += heap_pushes
+        self.heap_pops += heap_pops
+
+    def as_dict(self):
+        return {'settled': self.settled, 'relaxed': self.relaxed,
+                'heap_pushes': self.heap_pushes, 'heap_pops': self.heap_pops}
+
+
+def counted(neighbors, counters):
+    """Wrap a neighbors function so it adds the edges it returns to counters.relaxed.
+
+    Returns neighbors unchanged if counters is None.
+    """
+    if counters is None:
+        return neighbors
+
+    def counting(node):
+        edges = list(neighbors(node))
+        counters.relaxed += len(edges)
+        return edges
+    return counting
+
+
+SETTLE, RELAX = 0, 1  # Kinds of dijkstra_events steps
+
+
+def dijkstra_events(neighbors, source, target=None):
+    """Run Dijkstra's algorithm like dijkstra(), yielding every step as (kind, node, parent, distance).
+
+    A SETTLE step fixes the distance of node, reached over the edge from
+    parent (None for the source). A RELAX step lowers the tentative
+    distance of node over the edge from parent. The search stops once
+    target is settled.
+    """
+    dist = {}
+    seen = {source: 0}
+    pred = {}
+    c = count()
+    heap = [(0, next(c), source)]
+    while heap:
+        d, _, v = heappop(heap)
+        if v in dist:
+            continue
+        dist[v] = d
+        yield SETTLE, v, pred.get(v), d
+        if v == target:
+            break
+        for u, w in neighbors(v):
+            vu_dist = d + w
+            if u in dist:
+                if vu_dist < dist[u]:
+                    raise ValueError("Contradictory paths found:", "negative weights?")
+            elif u not in seen or vu_dist < seen[u]:
+                seen[u] = vu_dist
+                heappush(heap, (vu_dist, next(c), u))
+                pred[u] = v
+                yield RELAX, u, v, vu_dist
+
+
+class SearchTrace:
+    """The steps of a search stored in flat typed arrays, so it can be replayed without searching again.
+
+    Step i has kind kinds[i] (SETTLE or RELAX), node nodes[i], edge
+    edges[i] (-1 for the source) and distance distances[i]. Nodes and edges
+    are stored as integer positions chosen by the recorder. path is the
+    final path as node labels, or None if the target was not reached, and
+    path_nodes / path_edges hold its positions.
+    """
+
+    def __init__(self):
+        self.kinds = array('b')
+        self.nodes = array('i')
+        self.edges = array('i')
+        self.distances = array('d')
+        self.path = None
+        self.path_nodes = array('i')
+        self.path_edges = array('i')
+        self.length = inf
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def append(self, kind, node, edge, distance):
+        """Record one step."""
+        self.kinds.append(kind)
+        self.nodes.append(node)
+        self.edges.append(edge)
+        self.distances.append(distance)
+
+
+def unwind(pred, target):
+    """Follow a predecessor map back from target. Returns the path from the root to target."""
+    path = [target]
+    while path[-1] in pred:
+        path.append(pred[path[-1]])
+    path.reverse()
+    return path
+
+
+def bidirectional_dijkstra(neighbors, source, target, reverse_neighbors=None, counters=None):
+    """Search from source and from target at once. Returns (length, path, settled).
+
+    reverse_neighbors walks edges backwards; it defaults to neighbors, which
+    is right for undirected graphs. length is inf and path None if there is
+    no path.
+    """
+    if source == target:
+        return 0, [source], 1
+    reverse_neighbors = reverse_neighbors or neighbors
+    dists = [{}, {}]
+    seen = [{source: 0}, {target: 0}]
+    preds = [{}, {}]
+    heaps = [[(0, source)], [(0, target)]]
+    walks = [neighbors, reverse_neighbors]
+    best, meet = inf, None
+    pushes = 2
+    while heaps[0] and heaps[1]:
+        if heaps[0][0][0] + heaps[1][0][0] >= best:
+            break  # No path through an unsettled node can beat the best meeting point
+        side = 0 if heaps[0][0][0] <= heaps[1][0][0] else 1  # Grow the cheaper frontier
+        d, v = heappop(heaps[side])
+        if v in dists[side]:
+            continue
+        dists[side][v] = d
+        other_seen = seen[1 - side]
+        for u, w in walks[side](v):
+            vu_dist = d + w
+            if u not in dists[side] and vu_dist < seen[side].get(u, inf):
+                seen[side][u] = vu_dist
+                preds[side][u] = v
+                heappush(heaps[side], (vu_dist, u))
+                pushes += 1
+            if u in other_seen and vu_dist + other_seen[u] < best:
+                best = vu_dist + other_seen[u]
+                meet = (v, u) if side == 0 else (u, v)  # The edge joining the two searches
+
+    settled = len(dists[0]) + len(dists[1])
+    if counters is not None:
+        counters.add(settled, pushes, pushes - len(heaps[0]) - len(heaps[1]))
+    if meet is None:
+        return inf, None, settled
+    forward = unwind(preds[0], meet[0])
+    backward = unwind(preds[1], meet[1])[::-1]
+    return best, forward + backward, settled
+
+
+def astar(neighbors, source, target, heuristic, counters=None):
+    """A* search with an admissible, consistent heuristic(node) lower bound. Returns (length, path, settled)."""
+    dist = {}
+    seen = {source: 0}
+    pred = {}
+    c = count()
+    heap = [(heuristic(source), next(c), 0, source)]
+    while heap:
+        _, _, d, v = heappop(heap)
+        if v in dist:
+            continue
+        dist[v] = d
+        if v == target:
+            break
+        for u, w in neighbors(v):
+            vu_dist = d + w
+            if u not in dist and vu_dist < seen.get(u, inf):
+                seen[u] = vu_dist
+                pred[u] = v
+                heappush(heap, (vu_dist + heuristic(u), next(c), vu_dist, u))
+    if counters is not None:
+        pushes = next(c)
+        counters.add(len(dist), pushes, pushes - len(heap))
+    if target not in dist:
+        return inf, None, len(dist)
+    return dist[target], unwind(pred, target), len(dist)
+
+
+def euclidean_scale(edges, coords):
+    """Return the largest factor s such that s * straight-line distance never exceeds an edge weight.
+
+    Multiplying the distance to the target by s then gives an admissible and
+    consistent A* heuristic for any drawing of the graph. edges yields
+    (u, v, weight) and coords maps nodes to (x, y).
+    """
+    scale = inf
+    for u, v, w in edges:
+        (x1, y1), (x2, y2) = coords[u], coords[v]
+        length = math.hypot(x1 - x2, y1 - y2)
+        if length > 0:
+            scale = min(scale, w / length)
+    return 0.0 if scale == inf else scale
+
+
+def euclidean_heuristic(coords, target, scale):
+    """Return h(node) = scale * straight-line distance from node to target."""
+    tx, ty = coords[target]
+
+    def heuristic(node):
+        x, y = coords[node]
+        return scale * math.hypot(x - tx, y - ty)
+    return heuristic
+
+
+def select_landmarks(neighbors, nodes, count=8):
+    """Pick up to count landmarks by farthest-point selection. Returns their distance maps.
+
+    Each new landmark is the node farthest from all landmarks picked so far,
+    which spreads them towards the edges of the graph where the bounds are
+    tightest. nodes is a sequence of all nodes; the first one seeds the
+    selection.
+    """
+    if not nodes:
+        return []
+    dist, _ = dijkstra(neighbors, nodes[0])
+    start = max(dist, key=dist.get)  # Farthest from an arbitrary node
+    landmark_dists = []
+    nearest = {}
+    landmark = start
+    for _ in range(count):
+        dist, _ = dijkstra(neighbors, landmark)
+        landmark_dists.append(dist)
+        for node, d in dist.items():
+            if d < nearest.get(node, inf):
+                nearest[node] = d
+        landmark = max(nearest, key=nearest.get)
+        if nearest[landmark] == 0:
+            break  # Every reachable node is already a landmark
+    return landmark_dists
+
+
+def alt_heuristic(landmark_dists, target, directed=False):
+    """Return the ALT lower bound h(node) = max over landmarks L of |d(L, target) - d(L, node)|.
+
+    Landmarks in another component than the target do not bound anything and
+    are ignored. On a directed graph the landmark distances run forwards
+    only, so just d(L, target) - d(L, node) is a lower bound.
+    """
+    usable = [(dist, dist[target]) for dist in landmark_dists if target in dist]
+
+    def heuristic(node):
+        best = 0
+        for dist, to_target in usable:
+            d = dist.get(node)
+            if d is not None:
+                best = max(best, to_target - d if directed else abs(to_target - d))
+        return best
+    return heuristic